@@ -1,5 +1,14 @@
 import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
 
-from Game.game import Game    # noqa
-import pygame as core  # noqa
+
+def __getattr__(name):
+    # pygame is only imported when Game or core is used, so the math,
+    # graphic and physics modules import and run without it
+    if name == 'Game':
+        from Game.game import Game
+        return Game
+    if name == 'core':
+        import pygame as core
+        return core
+    raise AttributeError(f"module 'Game' has no attribute '{name}'")
@@ -1,11 +1,20 @@
 import pygame as pg    # noqa
 import platform
+import time
+
+# Event polls per second when the game isn't paced to it's fps
+TRAINING_EVENT_RATE = 10
 
 
 class Game:
 
-    def __init__(self) -> None:
-        if not pg.get_init():
+    def __init__(self, offscreen: bool = False) -> None:
+        """
+        offscreen: Draw into a pg.Surface without opening a display,
+                   frames are read with get_frame
+        """
+        self.offscreen = offscreen
+        if not pg.get_init() and not offscreen:
             os = platform.system()
             if os == "Linux":
                 # On linux pg.quit hangs. Some pygame modules don't work properly on linux
@@ -24,9 +33,20 @@ class Game:
         self.window_flags: int = 0
         self.running: bool = True
         self.rendering: bool = True
-        self.clock = pg.time.Clock()
+        # Render policy, see should_render
+        self.render_every: int = 1
+        self.render_eval_only: bool = False
+        self.evaluating: bool = False
+        self.frame: int = 0
+        # Rendered frames wait for the clock to keep fps, simulated time only
+        # depends on the planes' frame_rate so it's free to run faster
+        self.realtime: bool = True
+        self.clock = None if offscreen else pg.time.Clock()
 
         # Event
+        # Wall-clock polls per second, 0 polls every loop
+        self.event_rate: float = 0
+        self.event_time: float = 0
         self.mouse_x = 0
         self.mouse_y = 0
         self.keys = []
@@ -45,10 +65,17 @@ class Game:
             self.loop()
             self.__render()
 
+    def set_realtime(self, realtime: bool) -> None:
+        """ False runs unthrottled and polls events at TRAINING_EVENT_RATE """
+        self.realtime = realtime
+        self.event_rate = 0 if realtime else TRAINING_EVENT_RATE
+
     def loop_once(self):
-        self.__eventHandler()
+        if not self.offscreen and self.event_due():
+            self.__eventHandler()
         self.loop()
         self.__render()
+        self.frame += 1
 
     def loop(self):
         """ User should override this method """
@@ -63,6 +90,15 @@ class Game:
         """ User should override this method """
         ...
 
+    def event_due(self) -> bool:
+        if self.event_rate <= 0:
+            return True
+        now = time.perf_counter()
+        if now - self.event_time < 1 / self.event_rate:
+            return False
+        self.event_time = now
+        return True
+
     def __eventHandler(self):
         self.mouse_x, self.mouse_y = pg.mouse.get_pos()
         self.keys = pg.key.get_pressed()
@@ -77,22 +113,49 @@ class Game:
         """ User should override this method """
         ...
 
+    def should_render(self) -> bool:
+        """
+        True if this loop renders: rendering is on, it's one of every
+        render_every frames (0 never) and, with render_eval_only, evaluating
+        """
+        if not (self.rendering and self.running and self.render_every > 0):
+            return False
+        if self.render_eval_only and not self.evaluating:
+            return False
+        return self.frame % self.render_every == 0
+
     def __render(self):
-        if self.rendering and self.running:
+        if self.should_render():
             self.onRender()
+            if self.offscreen:
+                return
             if self.sprites.__len__() > 0:
                 pg.display.update(self.sprites)
             pg.display.flip()
-            if self.fps > 0:
+            if self.realtime and self.fps > 0:
                 self.clock.tick(self.fps)
 
+    def get_frame(self):
+        """
+        Last drawn frame as a (height, width, 3) uint8 view of the window,
+        it changes with the window, copy it to keep it
+        """
+        return pg.surfarray.pixels3d(self.window).transpose(1, 0, 2)
+
+    def render_frame(self):
+        """ Draws now whatever the render policy and returns get_frame """
+        self.onRender()
+        return self.get_frame()
+
     def onRender(self):
         """ User should override this method """
         ...
 
     def set_window(self) -> None:
         """ Avoid calling outside of PyGameBase instance """
-        if not self.window:
+        if not self.window and self.offscreen:
+            self.window = pg.Surface(self.size)
+        elif not self.window:
             self.window = pg.display.get_surface()
             if self.window is None:
                 self.window = pg.display.set_mode(self.size,
@@ -104,4 +167,5 @@ class Game:
 
     @staticmethod
     def set_title(title: str):
-        pg.display.set_caption(title)
+        if pg.display.get_init():
+            pg.display.set_caption(title)
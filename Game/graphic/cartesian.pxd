@@ -1,4 +1,7 @@
-from Game.math.core cimport point2d, vector2d
+from Game.math.core cimport scalar, point2d, vector2d
+
+
+cdef object draw()
 
 
 cdef class CartesianPlane:
@@ -19,6 +22,7 @@ cdef class CartesianPlane:
     cdef double get_X(self)
     cdef double get_Y(self)
     cdef (double, double) get_CENTER(self)
+    cdef (double, double) get_origin(self, CartesianPlane root)
     cdef void set_limit(self)
 
 
@@ -26,6 +30,9 @@ cdef class Vector2d(vector2d):
 
     cdef readonly CartesianPlane plane
     cdef point2d headXY
+    # Head scalars and the versions of head and plane center at the last update
+    cdef scalar cache_x, cache_y
+    cdef unsigned int cache_version[4]
 
     cpdef void random(self)
     cpdef void update(self)
@@ -1,9 +1,19 @@
 import cython
-from pygame.draw import line, aaline
 from Game.math.core cimport scalar, point2d, vector2d
 from libc.math cimport floor, sqrt
 from random import random
 
+cdef object _draw = None
+
+
+cdef object draw():
+    """ pygame.draw, imported by the first show() so nothing else needs pygame """
+    global _draw
+    if _draw is None:
+        from pygame import draw as pygame_draw
+        _draw = pygame_draw
+    return _draw
+
 
 @cython.optimize.unpack_method_calls(False)
 cdef class CartesianPlane:
@@ -59,12 +69,14 @@ cdef class CartesianPlane:
 
     @cython.optimize.unpack_method_calls(False)
     def show(self):
+        if self.parent_vector:
+            self.parent_vector.update()
         # draw x axis
-        line(self.window, (255, 0, 0), self.center.get_xy(),
-             (self.center.x.num, self.center.y.num-10), 2)
+        draw().line(self.window, (255, 0, 0), self.center.get_xy(),
+                    (self.center.x.num, self.center.y.num-10), 2)
         # draw y axis
-        line(self.window, (0, 255, 0), self.center.get_xy(),
-             (self.center.x.num+10, self.center.y.num), 2)
+        draw().line(self.window, (0, 255, 0), self.center.get_xy(),
+                    (self.center.x.num+10, self.center.y.num), 2)
 
     cpdef Vector2d get_parent_vector(self):
         return self.parent_vector
@@ -122,6 +134,22 @@ cdef class CartesianPlane:
             self.parent_vector.update()
         return (self.center.x.num, self.center.y.num)
 
+    cdef (double, double) get_origin(self, CartesianPlane root):
+        """
+        Origin of this plane in root's coordinates, summed up the parent
+        vectors so it never goes through window coordinates
+        """
+        cdef CartesianPlane plane = self
+        cdef double x = 0, y = 0
+        while plane is not root:
+            if plane.parent_vector is None:
+                # root is not an ancestor
+                return root.to_xy(self.get_CENTER())
+            x += plane.parent_vector.head.x.num
+            y += plane.parent_vector.head.y.num
+            plane = plane.parent_vector.plane
+        return (x, y)
+
     @cython.cdivision(True)
     cdef void set_limit(self):
         if self.parent_vector:
@@ -170,7 +198,8 @@ cdef class Vector2d(vector2d):
     @cython.nonecheck(False)
     @cython.optimize.unpack_method_calls(False)
     def show(self, color=(0, 0, 0)):
-        aaline(self.plane.window, color, self.plane.center.get_xy(), self.headXY.get_xy())
+        self.update()
+        draw().aaline(self.plane.window, color, self.plane.center.get_xy(), self.headXY.get_xy())
 
     def unit(self, double scale=1, bint vector=True):
         cdef (double, double) xy = self.unit_vector(scale)
@@ -189,14 +218,32 @@ cdef class Vector2d(vector2d):
         cdef double r1 = random()
         cdef double r2 = random()
         if self.max:
-            self.head.x.num = (r1 * 2 - 1) * self.max
-            self.head.y.num = (r2 * 2 - 1) * self.max
+            self.head.x.set_num((r1 * 2 - 1) * self.max)
+            self.head.y.set_num((r2 * 2 - 1) * self.max)
         else:
-            self.head.x.num = (r1 * 2 - 1) * self.plane.x_max
-            self.head.y.num = (r2 * 2 - 1) * self.plane.y_max
+            self.head.x.set_num((r1 * 2 - 1) * self.plane.x_max)
+            self.head.y.set_num((r2 * 2 - 1) * self.plane.y_max)
 
     cpdef void update(self):
-        self.headXY.set_xy(self.plane.to_XY(self.head.get_xy()))
+        """
+        Recomputes headXY only if the head or the plane center was written
+        since the last update, the parent planes are checked the same way
+        """
+        cdef point2d center = self.plane.center
+        if self.plane.parent_vector is not None:
+            self.plane.parent_vector.update()
+        if self.head.x is self.cache_x and self.head.y is self.cache_y and \
+                self.head.x.version == self.cache_version[0] and self.head.y.version == self.cache_version[1] and \
+                center.x.version == self.cache_version[2] and center.y.version == self.cache_version[3]:
+            return
+        self.headXY.set_xy((center.x.num + self.head.x.num * self.plane.unit_length,
+                            center.y.num - self.head.y.num * self.plane.unit_length))
+        self.cache_x = self.head.x
+        self.cache_y = self.head.y
+        self.cache_version[0] = self.head.x.version
+        self.cache_version[1] = self.head.y.version
+        self.cache_version[2] = center.x.version
+        self.cache_version[3] = center.y.version
 
     cdef double get_X(self):
         self.update()
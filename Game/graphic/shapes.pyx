@@ -1,9 +1,8 @@
 import cython
-from Game.graphic.cartesian cimport CartesianPlane, Vector2d
+from Game.graphic.cartesian cimport CartesianPlane, Vector2d, draw
 from Game.math.core cimport pi
 from libc.math cimport sqrt, atan2
 import numpy as np
-from pygame.draw import aalines, aaline, polygon, line
 
 @cython.optimize.unpack_method_calls(False)
 cdef class Shape:
@@ -51,6 +50,8 @@ cdef class Shape:
     def show(self, show_vertex=False, width=1):
         cdef int i
         cdef list heads = []
+        # Window coordinates are only needed for drawing
+        self.update()
         if show_vertex:
             for i in range(self.vertex_count):
                 (<Vector2d>self.vertices[i]).show(self.color)
@@ -59,11 +60,11 @@ cdef class Shape:
             for i in range(self.vertex_count):
                 heads.append((<Vector2d>self.vertices[i]).headXY.get_xy())
         if width == 1:
-            aalines(self.plane.window, self.color, True, heads)
+            draw().aalines(self.plane.window, self.color, True, heads)
         elif width > 1:
-            polygon(self.plane.window, self.color, heads, width)
+            draw().polygon(self.plane.window, self.color, heads, width)
         else:
-            polygon(self.plane.window, self.color, heads)
+            draw().polygon(self.plane.window, self.color, heads)
 
     cdef void update(self):
         for i in range(self.vertex_count):
@@ -102,10 +103,11 @@ cdef class Line(Shape):
     @cython.nonecheck(False)
     @cython.initializedcheck(False)
     def show(self, show_vertex=False, width=1):
+        self.update()
         if width == 1:
-            aaline(self.plane.window, self.color, self.plane.center.get_xy(), (<Vector2d>self.vertices[0]).headXY.get_xy())
+            draw().aaline(self.plane.window, self.color, self.plane.center.get_xy(), (<Vector2d>self.vertices[0]).headXY.get_xy())
         else:
-            line(self.plane.window, self.color, self.plane.center.get_xy(), (<Vector2d>self.vertices[0]).headXY.get_xy())
+            draw().line(self.plane.window, self.color, self.plane.center.get_xy(), (<Vector2d>self.vertices[0]).headXY.get_xy())
 
 @cython.optimize.unpack_method_calls(False)
 cdef class Rectangle(Shape):
@@ -3,11 +3,14 @@ cdef double pi
 cdef class scalar:
     cdef public double min, max
     cdef double num
+    # Bumped on every write that changes num, lets dependents skip recomputation
+    cdef unsigned int version
 
     cdef void add(self, double o)
     cdef void scale(self, double o)
     cdef double get_value(self)
     cdef void set_value(self, double o)
+    cdef void set_num(self, double o)
 
 cdef class point2d:
     cdef scalar x, y
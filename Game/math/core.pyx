@@ -12,6 +12,7 @@ cdef class scalar:
         self.num = 0
         self.min = 0
         self.max = 0
+        self.version = 0
 
     def __init__(self, double value, (double, double) limits=(0, 0)):
         if limits[0] or limits[1]:
@@ -32,13 +33,7 @@ cdef class scalar:
 
     @value.setter
     def value(self, double o):
-        if self.max:
-            if (self.min <= o) and (o <= self.max):
-                self.num = o
-            else:
-                self.num = self.min if o < self.min else self.max
-        else:
-            self.num = o
+        self.set_value(o)
 
     def __repr__(self):
         return str(self.num)
@@ -54,12 +49,15 @@ cdef class scalar:
 
     cdef void set_value(self, double o):
         if self.max:
-            if self.min <= o <= self.max:
-                self.num = o
-            else:
-                self.num = self.min if o < self.min else self.max
-        else:
+            if not (self.min <= o <= self.max):
+                o = self.min if o < self.min else self.max
+        self.set_num(o)
+
+    cdef void set_num(self, double o):
+        """ Unclamped write, the version only moves if the value changed """
+        if o != self.num:
             self.num = o
+            self.version += 1
 
 
 @cython.optimize.unpack_method_calls(False)
@@ -258,8 +256,8 @@ cdef class vector2d:
                     self.head.y.add(o * sin(a))
                 else:
                     a = self.dir()
-                    self.head.x.num = cos(a) * self.max
-                    self.head.y.num = sin(a) * self.max
+                    self.head.x.set_num(cos(a) * self.max)
+                    self.head.y.set_num(sin(a) * self.max)
             else:
                 a = self.dir()
                 self.head.x.add(o * cos(a))
@@ -271,8 +269,8 @@ cdef class vector2d:
                 self.head.y.add(o * sin(a))
             else:
                 a = self.dir()
-                self.head.x.num = cos(a) * self.min
-                self.head.y.num = sin(a) * self.min
+                self.head.x.set_num(cos(a) * self.min)
+                self.head.y.set_num(sin(a) * self.min)
 
     cpdef void scale(self, double o):
         cdef double v_len = self.mag()
@@ -283,8 +281,8 @@ cdef class vector2d:
                     self.head.y.scale(o)
                 else:
                     o = self.dir()
-                    self.head.x.num = cos(o) * self.max
-                    self.head.y.num = sin(o) * self.max
+                    self.head.x.set_num(cos(o) * self.max)
+                    self.head.y.set_num(sin(o) * self.max)
             else:
                 self.head.x.scale(o)
                 self.head.y.scale(o)
@@ -294,8 +292,8 @@ cdef class vector2d:
                 self.head.y.scale(o)
             else:
                 o = self.dir()
-                self.head.x.num = cos(o) * self.min
-                self.head.y.num = sin(o) * self.min
+                self.head.x.set_num(cos(o) * self.min)
+                self.head.y.set_num(sin(o) * self.min)
 
     cpdef void rotate(self, double radians):
         cdef double x = self.head.x.num
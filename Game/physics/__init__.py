@@ -10,4 +10,5 @@ from Game.physics.body import (Body,
                                Ray, Player, Ball,
                                GoalKeeper)
 from Game.physics.collision import collision
-from Game.physics.engine import EnginePolygon
+from Game.physics.engine import EnginePolygon, EngineBatch
+from Game.physics.world import World
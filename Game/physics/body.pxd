@@ -16,6 +16,8 @@ cdef class Body:
     cdef readonly Vector2d velocity
     cdef readonly bint is_attached
     cdef readonly bint is_following_dir
+    cdef readonly bint is_integrable
+    cdef readonly bint is_round
     cdef Body parent_body
 
     cpdef void step(self)
@@ -24,9 +26,13 @@ cdef class Body:
     cpdef (double, double) position(self)
     cpdef double direction(self)
     cpdef double speed(self)
+    cpdef int state_size(self)
+    cpdef int save_state(self, double[::1] out, int offset)
+    cpdef int load_state(self, const double[::1] state, int offset)
     cpdef void attach(self, Body o, bint follow_dir)
     cpdef void detach(self, Body o)
     cdef void USR_step(self)
+    cdef void USR_step_children(self)
     cdef void USR_resolve_collision(self, Body o, (double, double) dxy)
     cdef void USR_resolve_collision_point(self, double dx, double dy)
 
@@ -81,14 +87,8 @@ cdef class Player(DynamicPolygonBody):
     cdef readonly double PLAYER_MAX_TURN_RATE
     cdef readonly double PLAYER_MAX_FOV
 
-cdef class GoalKeeper(DynamicPolygonBody):
-    cdef double ability_point
-    cdef readonly int team_id
-    cdef public bint kicked
-    cdef public bint has_ball
-    cdef StaticPolygonBody mark
-    cdef readonly double PLAYER_SIZE
-    cdef readonly double PLAYER_MAX_SPEED
-    cdef readonly double PLAYER_SPEED_BALL
-    cdef readonly double PLAYER_MAX_TURN_RATE
-    cdef readonly double PLAYER_MAX_FOV
\ No newline at end of file
+    cpdef void kick(self, FreePolygonBody ball, double power)
+    cpdef void control(self, double acceleration, double turn, double kick_power, FreePolygonBody ball)
+
+cdef class GoalKeeper(Player):
+    pass
\ No newline at end of file
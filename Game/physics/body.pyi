@@ -1,3 +1,4 @@
+import numpy as np
 from Game.graphic.cartesian import CartesianPlane, Vector2d
 from Game.graphic.shapes import Shape
 
@@ -10,6 +11,8 @@ class Body:
     drag_coef: float
     is_attached: bool
     is_following_dir: bool
+    is_integrable: bool
+    is_round: bool
     shape: Shape
     velocity: Vector2d
     def __init__(self, id: int, type: int) -> None: ...
@@ -29,6 +32,16 @@ class Body:
         ...
 
     def speed(self) -> float: ...
+    def state_size(self) -> int: ...
+    def save_state(self, out: np.ndarray, offset: int) -> int:
+        """
+        Writes position, velocity, speed limits and vertices into out[offset:].
+        @return
+        Offset after the written values.
+        """
+        ...
+
+    def load_state(self, state: np.ndarray, offset: int) -> int: ...
     def step(self) -> None: ...
     def attach(self, o: Body, follow_dir: bool) -> None: ...
     def detach(self) -> None: ...
@@ -105,17 +118,12 @@ class Player(DynamicPolygonBody):
     def __init__(self, id: int, team_id: int, plane: CartesianPlane, ability_point: float = 0.95) -> None: ...
     def reset(self, position: tuple, diraction: float) -> None: ...
     def kick(self, ball: FreePolygonBody, power: float) -> None: ...
+    def control(self, acceleration: float, turn: float, kick_power: float, ball: FreePolygonBody) -> None:
+        """
+        turn: [-1, 1] Fraction of PLAYER_MAX_TURN_RATE, slows down with speed
+        """
+        ...
 
 
-class GoalKeeper(DynamicPolygonBody):
-    PLAYER_SIZE: int
-    PLAYER_MAX_SPEED: int
-    PLAYER_SPEED_BALL: int
-    PLAYER_MAX_TURN_RATE: int
-    PLAYER_MAX_FOV: int
-    team_id: int
-    kicked: bool
-    has_ball: bool
-    def __init__(self, id: int, team_id: int, plane: CartesianPlane, ability_point: float = 1.0) -> None: ...
-    def reset(self, position: tuple, diraction: float) -> None: ...
-    def kick(self, ball: FreePolygonBody, power: float) -> None: ...
\ No newline at end of file
+class GoalKeeper(Player):
+    def __init__(self, id: int, team_id: int, plane: CartesianPlane, ability_point: float = 1.0) -> None: ...
\ No newline at end of file
@@ -1,8 +1,7 @@
 import cython
-from Game.graphic.cartesian cimport CartesianPlane, Vector2d
+from Game.graphic.cartesian cimport CartesianPlane, Vector2d, draw
 from Game.graphic.shapes cimport Polygon, Rectangle, Triangle, Line
 from Game.math.core cimport pi, point2d
-from pygame.draw import aalines, aaline, circle
 from libc.math cimport floor, sqrt
 import numpy as np
 
@@ -15,6 +14,9 @@ cdef class Body:
     def __cinit__(self, *args, **kwargs):
         self.is_attached = False
         self.is_following_dir = False
+        self.is_integrable = False
+        # Collides as a circle of radius instead of it's polygon
+        self.is_round = False
         self.type = FREE
         self.id = 0
         self.radius = 0
@@ -54,11 +56,13 @@ cdef class Body:
                 self.velocity.rotate(d)
         else:
             self.USR_step()
-        self.shape.update()
 
     cdef void USR_step(self):
         pass
 
+    cdef void USR_step_children(self):
+        pass
+
     cdef void USR_resolve_collision(self, Body o, (double, double) dxy):
         pass
 
@@ -109,6 +113,53 @@ cdef class Body:
         cdef double s = floor((self.velocity.mag() - 1.0) * 1000.0) / 1000.0
         return s if s > 0 else 0.0
 
+    cpdef int state_size(self):
+        """ Number of doubles save_state writes """
+        return 6 + self.shape.vertex_count * 2
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.initializedcheck(False)
+    cpdef int save_state(self, double[::1] out, int offset):
+        """
+        Writes position, velocity, speed limits and vertices at offset,
+        returns the offset after them
+        """
+        cdef int i
+        out[offset] = self.shape.plane.parent_vector.head.x.num
+        out[offset + 1] = self.shape.plane.parent_vector.head.y.num
+        out[offset + 2] = self.velocity.head.x.num
+        out[offset + 3] = self.velocity.head.y.num
+        out[offset + 4] = self.velocity.max
+        out[offset + 5] = self.velocity.min
+        offset += 6
+        for i in range(self.shape.vertex_count):
+            out[offset] = (<Vector2d>self.shape.vertices[i]).head.x.num
+            out[offset + 1] = (<Vector2d>self.shape.vertices[i]).head.y.num
+            offset += 2
+        return offset
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.initializedcheck(False)
+    cpdef int load_state(self, const double[::1] state, int offset):
+        """ Reverse of save_state, values are written as they are (no clamping) """
+        cdef int i
+        cdef Vector2d vertex
+        self.shape.plane.parent_vector.head.x.set_num(state[offset])
+        self.shape.plane.parent_vector.head.y.set_num(state[offset + 1])
+        self.velocity.head.x.set_num(state[offset + 2])
+        self.velocity.head.y.set_num(state[offset + 3])
+        self.velocity.max = state[offset + 4]
+        self.velocity.min = state[offset + 5]
+        offset += 6
+        for i in range(self.shape.vertex_count):
+            vertex = <Vector2d>self.shape.vertices[i]
+            vertex.head.x.set_num(state[offset])
+            vertex.head.y.set_num(state[offset + 1])
+            offset += 2
+        return offset
+
 @cython.optimize.unpack_method_calls(False)
 cdef class FreeBody(Body):
     def __cinit__(self, *args, **kwargs):
@@ -118,6 +169,7 @@ cdef class FreeBody(Body):
         if plane.parent_vector is None:
             raise AttributeError("A body can't be made from a base plane, Use child plane instead!")
         super().__init__(id, FREE)
+        self.is_integrable = True
         self.drag_coef = drag_coef
         self.velocity = Vector2d(plane, 1, 0, max_speed, 1)
         self.velocity.rotate(pi/2)
@@ -164,6 +216,7 @@ cdef class DynamicBody(Body):
         if plane.parent_vector is None:
             raise AttributeError("A body can't be made from a base plane, Use child plane instead!")
         super().__init__(id, DYNAMIC)
+        self.is_integrable = True
         self.drag_coef = drag_coef
         self.friction_coef = friction_coef
         self.velocity = Vector2d(plane, 1, 0, max_speed, 1)
@@ -216,6 +269,21 @@ cdef class Ray(FreeBody):
         self.x = 0
         self.y = 0
 
+    cpdef int state_size(self):
+        return Body.state_size(self) + 2
+
+    cpdef int save_state(self, double[::1] out, int offset):
+        offset = Body.save_state(self, out, offset)
+        out[offset] = self.x
+        out[offset + 1] = self.y
+        return offset + 2
+
+    cpdef int load_state(self, const double[::1] state, int offset):
+        offset = Body.load_state(self, state, offset)
+        self.x = state[offset]
+        self.y = state[offset + 1]
+        return offset + 2
+
     cdef void USR_resolve_collision_point(self, double dx, double dy):
         if (self.x != 0 or self.y != 0):
             if ((self.x * self.x + self.y * self.y) > (dx * dx + dy * dy)):
@@ -234,7 +302,7 @@ cdef class Ray(FreeBody):
     def show(self, vertex=False, velocity=False, width=1):
         self.shape.show(False, width)
         if self.x != 0 or self.y != 0:
-            circle(self.shape.plane.window, (255, 0, 0), self.shape.plane.to_XY((self.x, self.y)), 3)
+            draw().circle(self.shape.plane.window, (255, 0, 0), self.shape.plane.to_XY((self.x, self.y)), 3)
         self.x = 0
         self.y = 0
 
@@ -321,6 +389,9 @@ cdef class Ball(FreePolygonBody):
                  double max_speed=0,
                  double drag_coef=0):
         super().__init__(id, plane.createPlane(0, 0), size, max_speed, drag_coef)
+        # Ball only moves while it's free, it has it's own step
+        self.is_integrable = False
+        self.is_round = True
         self.is_free = True
         self.is_out = False
 
@@ -349,6 +420,22 @@ cdef class Ball(FreePolygonBody):
         else:
             self.is_out = False
 
+    cpdef int state_size(self):
+        return FreePolygonBody.state_size(self) + 2
+
+    cpdef int save_state(self, double[::1] out, int offset):
+        offset = FreePolygonBody.save_state(self, out, offset)
+        out[offset] = self.is_free
+        out[offset + 1] = self.is_out
+        return offset + 2
+
+    cpdef int load_state(self, const double[::1] state, int offset):
+        """ The owner of the ball's heads must be restored first, see Football.restore """
+        offset = FreePolygonBody.load_state(self, state, offset)
+        self.is_free = state[offset] != 0
+        self.is_out = state[offset + 1] != 0
+        return offset + 2
+
     def reset(self, (double, double) pos):
         self.is_free = True
         self.velocity.set_head_ref(point2d(1, 0))
@@ -375,6 +462,7 @@ cdef class Player(DynamicPolygonBody):
                  CartesianPlane plane,
                  double ability_point = 0.95):
         super().__init__(id, plane.createPlane(0, 0), (self.PLAYER_SIZE,) * 5, self.PLAYER_MAX_SPEED, 0.01, 0.3)
+        self.is_round = True
         self.team_id = team_id
         self.kicked = False
         self.has_ball = False
@@ -383,8 +471,7 @@ cdef class Player(DynamicPolygonBody):
         self.mark.shape.color = (255, 0, 0)
         self.attach(self.mark, True)
 
-    def kick(self, FreePolygonBody ball, double power):
-        cdef double d
+    cpdef void kick(self, FreePolygonBody ball, double power):
         if self.has_ball:
             power += 1
             ball.is_free = True
@@ -397,6 +484,33 @@ cdef class Player(DynamicPolygonBody):
             self.kicked = True
             self.has_ball = False
 
+    @cython.cdivision(True)
+    cpdef void control(self, double acceleration, double turn, double kick_power, FreePolygonBody ball):
+        cdef double speed
+        if turn != 0:
+            # Turning gets slower as the player speeds up
+            speed = self.speed() / self.PLAYER_MAX_SPEED
+            self.rotate(turn * self.PLAYER_MAX_TURN_RATE / (speed + 1))
+        if acceleration != 0:
+            self.accelerate(acceleration)
+        if kick_power > 0:
+            self.kick(ball, kick_power)
+
+    cpdef int state_size(self):
+        return DynamicPolygonBody.state_size(self) + 2 + self.mark.state_size()
+
+    cpdef int save_state(self, double[::1] out, int offset):
+        offset = DynamicPolygonBody.save_state(self, out, offset)
+        out[offset] = self.has_ball
+        out[offset + 1] = self.kicked
+        return self.mark.save_state(out, offset + 2)
+
+    cpdef int load_state(self, const double[::1] state, int offset):
+        offset = DynamicPolygonBody.load_state(self, state, offset)
+        self.has_ball = state[offset] != 0
+        self.kicked = state[offset + 1] != 0
+        return self.mark.load_state(state, offset + 2)
+
     def reset(self, (double, double) position, double diraction):
         cdef double tmp = diraction - self.velocity.dir()
         self.shape.plane.parent_vector.set_head(position)
@@ -412,7 +526,7 @@ cdef class Player(DynamicPolygonBody):
         super().show(vertex, velocity, 0)
         self.mark.show(False, False, 0)
         if self.has_ball:
-            circle(self.shape.plane.window, (255, 0, 0), self.velocity.plane.center.get_xy(), 20)
+            draw().circle(self.shape.plane.window, (255, 0, 0), self.velocity.plane.center.get_xy(), 20)
 
     @cython.cdivision(True)
     cdef void USR_step(self):
@@ -430,6 +544,9 @@ cdef class Player(DynamicPolygonBody):
                 self.velocity.add((1-v_len) * self.drag_coef)
         else:
             self.velocity.set_head(self.velocity.unit_vector(1))
+        self.USR_step_children()
+
+    cdef void USR_step_children(self):
         self.mark.step()
 
     cdef void USR_resolve_collision(self, Body o, (double, double) dxy):
@@ -456,7 +573,7 @@ cdef class Player(DynamicPolygonBody):
 
 
 @cython.optimize.unpack_method_calls(False)
-cdef class GoalKeeper(DynamicPolygonBody):
+cdef class GoalKeeper(Player):
 
     def __cinit__(self, *args, **kwargs):
         self.PLAYER_SIZE = 40
@@ -470,84 +587,4 @@ cdef class GoalKeeper(DynamicPolygonBody):
                  int team_id,
                  CartesianPlane plane,
                  double ability_point = 1):
-        super().__init__(id, plane.createPlane(0, 0), (self.PLAYER_SIZE,) * 5, self.PLAYER_MAX_SPEED, 0.01, 0.3)
-        self.team_id = team_id
-        self.kicked = False
-        self.has_ball = False
-        self.ability_point = ability_point
-        # self.shape.plane.parent_vector.max = 200
-        self.mark = StaticPolygonBody(0, plane.createPlane(0, 0), (20, 7, 7))
-        self.mark.shape.color = (255, 0, 0)
-        self.attach(self.mark, True)
-
-    def kick(self, FreePolygonBody ball, double power):
-        cdef double d
-        if self.has_ball:
-            power += 1
-            ball.is_free = True
-            ball.velocity.set_head_ref(point2d(1, 0))
-            ball.velocity.set_head(self.velocity.unit_vector(power))
-            ball.shape.plane.parent_vector.set_head_ref(point2d(1, 0))
-            ball.shape.plane.parent_vector.set_head(self.shape.plane.parent_vector.get_head())
-
-            self.velocity.max = self.PLAYER_MAX_SPEED
-            self.kicked = True
-            self.has_ball = False
-
-    def reset(self, (double, double) position, double diraction):
-        cdef double tmp = diraction - self.velocity.dir()
-        self.shape.plane.parent_vector.set_head(position)
-        self.velocity.max = self.PLAYER_MAX_SPEED
-        self.velocity.rotate(tmp)
-        self.velocity.set_head(self.velocity.unit_vector(1))
-        self.shape.rotate(tmp)
-        self.kicked = False
-        self.has_ball = False
-
-    def show(self, color=(150, 150, 150), vertex=False, velocity=False, width=1):
-        self.shape.color = color
-        super().show(vertex, velocity, 0)
-        self.mark.show(False, False, 0)
-        if self.has_ball:
-            circle(self.shape.plane.window, (255, 0, 0), self.velocity.plane.center.get_xy(), 20)
-
-    @cython.cdivision(True)
-    cdef void USR_step(self):
-        cdef double v_len = floor(self.velocity.mag() * 1000.0) / 1000.0
-        cdef (double, double) xy
-        cdef (double, double) _xy
-        if v_len > 1:
-            if not self.is_attached:
-                xy = self.velocity.get_head()
-                _xy = self.velocity.unit_vector(1)
-                self.shape.plane.parent_vector.set_head((self.shape.plane.parent_vector.get_x() + (xy[0] - _xy[0]) / self.shape.plane.frame_rate,
-                                                         self.shape.plane.parent_vector.get_y() + (xy[1] - _xy[1]) / self.shape.plane.frame_rate))
-            # Drag is applied even if it's attached to another body
-            if self.drag_coef:
-                self.velocity.add((1-v_len) * self.drag_coef)
-        else:
-            self.velocity.set_head(self.velocity.unit_vector(1))
-        self.mark.step()
-
-    cdef void USR_resolve_collision(self, Body o, (double, double) dxy):
-        if o.type == DYNAMIC:
-            self.velocity.scale(self.friction_coef)
-            o.velocity.scale(self.friction_coef)
-            self.shape.plane.parent_vector.set_head((self.shape.plane.parent_vector.head.x.num + -dxy[0]/2, self.shape.plane.parent_vector.head.y.num + -dxy[1]/2))
-            o.shape.plane.parent_vector.set_head((o.shape.plane.parent_vector.head.x.num + dxy[0]/2, o.shape.plane.parent_vector.head.y.num + dxy[1]/2))
-            if self.team_id != o.team_id:
-                if np.random.random() > self.ability_point:
-                    #TODO fix ball ref
-                    if self.has_ball:
-                        self.has_ball = False
-                        self.velocity.max = self.PLAYER_MAX_SPEED
-                        o.has_ball = True
-                        o.velocity.max = self.PLAYER_SPEED_BALL
-                    elif o.has_ball:
-                        self.has_ball = True
-                        self.velocity.max = self.PLAYER_SPEED_BALL
-                        o.has_ball = False
-                        o.velocity.max = self.PLAYER_MAX_SPEED
-        elif o.type == STATIC:
-            self.velocity.scale(self.friction_coef)
-            self.shape.plane.parent_vector.set_head((self.shape.plane.parent_vector.head.x.num + -dxy[0], self.shape.plane.parent_vector.head.y.num + -dxy[1]))
+        super().__init__(id, team_id, plane, ability_point)
@@ -5,6 +5,20 @@ from Game.physics.body cimport Body
 cdef class collision:
 
     cdef CartesianPlane plane
+    # World coordinate tables of the bound bodies
+    cdef Body[:] bodies
+    cdef double[:, ::1] centers
+    cdef double[:, ::1] vertices
+    cdef int[::1] vertex_start
 
+    cpdef void bind(self, Body[:] bodies)
+    cpdef void snapshot(self)
+    cdef void snapshot_body(self, int i)
     cpdef void check(self, Body b1, Body b2)
     cdef void diagonal_intersect(self, Body body1, Body body2)
+    cdef bint circle_intersect(self, Body b1, Body b2)
+    cdef bint circle_edge_intersect(self, int body1, Body b2, double[:, ::1] edges, int start, int end)
+    cdef (double, double, double) edge_overlap(self, double[:, ::1] p1, int s1, int e1, double[:, ::1] p2, int s2, int e2)
+    cdef (double, double, double) separating_axis(self, double[:, ::1] p1, int s1, int e1, double[:, ::1] p2, int s2, int e2)
+    cdef void polygon_intersect(self, int body1, int body2)
+    cdef void edge_intersect(self, int body1, Body b2, double[:, ::1] edges, int start, int end)
\ No newline at end of file
@@ -1,7 +1,26 @@
+import numpy as np
 from Game.graphic.cartesian import CartesianPlane
 from Game.physics.body import Body
 
 
 class collision:
     def __init__(self, plane: CartesianPlane) -> None: ...
+    @property
+    def centers(self) -> np.ndarray:
+        """
+        @return
+        (bodies, 2) Plane coordinates of the bound body centers at the last snapshot.
+        """
+        ...
+
+    @property
+    def vertices(self) -> np.ndarray:
+        """
+        @return
+        (vertices, 2) Plane coordinates of every bound body vertex at the last snapshot.
+        """
+        ...
+
+    def bind(self, bodies: memoryview) -> None: ...
+    def snapshot(self) -> None: ...
     def check(self, b1: Body, b2: Body) -> None: ...
@@ -3,6 +3,53 @@ from Game.graphic.cartesian cimport CartesianPlane, Vector2d
 from Game.physics.body cimport Body, FREE
 from Game.math.util cimport LSI as line_segment_intersect
 from Game.math.core cimport point2d
+from libc.math cimport sqrt
+import numpy as np
+
+
+@cython.wraparound(False)
+@cython.boundscheck(False)
+@cython.initializedcheck(False)
+cdef inline double signed_area(double[:, ::1] p, int s, int e):
+    """ Twice the signed area of rows [s, e) of p, positive if counter clockwise """
+    cdef int i, j
+    cdef double a = 0
+    for i in range(s, e):
+        j = i + 1 if i + 1 < e else s
+        a += p[i, 0] * p[j, 1] - p[j, 0] * p[i, 1]
+    return a
+
+
+@cython.wraparound(False)
+@cython.boundscheck(False)
+@cython.initializedcheck(False)
+cdef inline int lowest(double[:, ::1] p, int s, int e, double ax, double ay):
+    """ Row of [s, e) with the lowest projection on (ax, ay) """
+    cdef int i, k = s
+    for i in range(s + 1, e):
+        if p[i, 0] * ax + p[i, 1] * ay < p[k, 0] * ax + p[k, 1] * ay:
+            k = i
+    return k
+
+
+@cython.wraparound(False)
+@cython.boundscheck(False)
+@cython.initializedcheck(False)
+cdef inline int walk(double[:, ::1] p, int s, int e, int k, int step, double ax, double ay):
+    """ Moves row k of a convex polygon by step while it's projection on (ax, ay) goes down """
+    cdef int w, n
+    for w in range(e - s):
+        n = k + step
+        if n == e:
+            n = s
+        elif n < s:
+            n = e - 1
+        if p[n, 0] * ax + p[n, 1] * ay < p[k, 0] * ax + p[k, 1] * ay:
+            k = n
+        else:
+            break
+    return k
+
 
 @cython.optimize.unpack_method_calls(False)
 cdef class collision:
@@ -12,9 +59,107 @@ cdef class collision:
 
     def __init__(self, CartesianPlane plane) -> None:
         self.plane = plane
+        self.bind(np.array([], dtype=Body))
+
+    @property
+    def centers(self):
+        return np.asarray(self.centers)
+
+    @property
+    def vertices(self):
+        return np.asarray(self.vertices)
+
+    cpdef void bind(self, Body[:] bodies):
+        """
+        Allocates the world coordinate tables of bodies, the engine
+        refreshes them with snapshot() after every body step
+        """
+        self.bodies = bodies
+        self.centers = np.zeros((bodies.shape[0], 2), dtype=np.float64)
+        self.vertex_start = np.cumsum([0] + [b.shape.vertex_count for b in bodies], dtype=np.int32)
+        self.vertices = np.zeros((self.vertex_start[bodies.shape[0]], 2), dtype=np.float64)
+        self.snapshot()
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef void snapshot(self):
+        """ Body centers and vertices in plane coordinates, from position + vertex heads """
+        cdef int i
+        for i in range(self.bodies.shape[0]):
+            self.snapshot_body(i)
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cdef void snapshot_body(self, int i):
+        """ snapshot() of bound body i alone, after a contact moved it """
+        cdef int k
+        cdef Body b = <Body>self.bodies[i]
+        cdef (double, double) xy = b.shape.plane.get_origin(self.plane)
+        self.centers[i, 0] = xy[0]
+        self.centers[i, 1] = xy[1]
+        for k in range(b.shape.vertex_count):
+            self.vertices[self.vertex_start[i] + k, 0] = xy[0] + (<Vector2d>b.shape.vertices[k]).head.x.num
+            self.vertices[self.vertex_start[i] + k, 1] = xy[1] + (<Vector2d>b.shape.vertices[k]).head.y.num
 
     cpdef void check(self, Body b1, Body b2):
-        self.diagonal_intersect(b1, b2)
+        if b1.is_round and b2.is_round:
+            self.circle_intersect(b1, b2)
+        else:
+            self.diagonal_intersect(b1, b2)
+
+    @cython.cdivision(True)
+    cdef bint circle_intersect(self, Body b1, Body b2):
+        """
+        Circle against circle, pushes b1 out of b2 along the line between
+        the centers by the penetration depth in one resolution
+        """
+        cdef (double, double) c1 = b1.shape.plane.get_origin(self.plane)
+        cdef (double, double) c2 = b2.shape.plane.get_origin(self.plane)
+        cdef double dx = c2[0] - c1[0]
+        cdef double dy = c2[1] - c1[1]
+        cdef double d = sqrt(dx * dx + dy * dy)
+        cdef double depth = b1.radius + b2.radius - d
+        if depth <= 0 or d == 0:
+            return False
+        b1.USR_resolve_collision(b2, (dx / d * depth, dy / d * depth))
+        return True
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.cdivision(True)
+    @cython.initializedcheck(False)
+    cdef bint circle_edge_intersect(self, int body1, Body b2, double[:, ::1] edges, int start, int end):
+        """
+        Circle of bound body1 against b2's baked edges, resolved once
+        along the normal of the deepest edge
+        """
+        cdef Body b1 = <Body>self.bodies[body1]
+        cdef (double, double) c = b1.shape.plane.get_origin(self.plane)
+        cdef int j
+        cdef double ex, ey, t, px, py, d, depth = 0, nx = 0, ny = 0
+        for j in range(start, end):
+            # Closest point of the edge to the center
+            ex = edges[j, 2] - edges[j, 0]
+            ey = edges[j, 3] - edges[j, 1]
+            t = ex * ex + ey * ey
+            if t > 0:
+                t = ((c[0] - edges[j, 0]) * ex + (c[1] - edges[j, 1]) * ey) / t
+                t = 0 if t < 0 else (1 if t > 1 else t)
+            px = c[0] - (edges[j, 0] + ex * t)
+            py = c[1] - (edges[j, 1] + ey * t)
+            d = sqrt(px * px + py * py)
+            if d > 0 and b1.radius - d > depth:
+                depth = b1.radius - d
+                nx = px / d
+                ny = py / d
+        if depth <= 0:
+            return False
+        b1.USR_resolve_collision(b2, (-nx * depth, -ny * depth))
+        return True
 
     @cython.wraparound(False)
     @cython.boundscheck(False)
@@ -25,6 +170,7 @@ cdef class collision:
         cdef Body b2 = body2
         cdef int i, j, k
         cdef double dx = 0, dy = 0, val
+        cdef (double, double) o2
         cdef (double, double) l1s
         cdef (double, double) l1e
         cdef (double, double) l2s
@@ -38,16 +184,18 @@ cdef class collision:
                     b2 = body1
             dx = 0
             dy = 0
-            l1s = self.plane.to_xy(b1.shape.plane.center.get_xy())
+            l1s = b1.shape.plane.get_origin(self.plane)
+            o2 = b2.shape.plane.get_origin(self.plane)
             for i in range(b1.shape.vertex_count):
                 # check for every vertex of first shape against ...
-                l1e = self.plane.to_xy((<Vector2d>b1.shape.vertices[i]).headXY.get_xy())
-                l2s = self.plane.to_xy((<Vector2d>b2.shape.vertices[0]).headXY.get_xy())
+                l1e = (l1s[0] + (<Vector2d>b1.shape.vertices[i]).head.x.num, l1s[1] + (<Vector2d>b1.shape.vertices[i]).head.y.num)
+                l2s = (o2[0] + (<Vector2d>b2.shape.vertices[0]).head.x.num, o2[1] + (<Vector2d>b2.shape.vertices[0]).head.y.num)
                 for j in range(b2.shape.vertex_count):
                     # ... every edge of second shape
                     if j > 0:
                         l2s = l2e
-                    l2e = self.plane.to_xy((<Vector2d>b2.shape.vertices[(j+1)%b2.shape.vertex_count]).headXY.get_xy())
+                    l2e = (o2[0] + (<Vector2d>b2.shape.vertices[(j+1)%b2.shape.vertex_count]).head.x.num,
+                           o2[1] + (<Vector2d>b2.shape.vertices[(j+1)%b2.shape.vertex_count]).head.y.num)
                     # check these two line segments are intersecting or not
                     val = line_segment_intersect(l1s[0], l1s[1], l1e[0], l1e[1], l2s[0], l2s[1], l2e[0], l2e[1])
                     if val != 0:
@@ -56,3 +204,155 @@ cdef class collision:
                         b1.USR_resolve_collision_point((l1e[0] - l1s[0]) * val, (l1e[1] - l1s[1]) * val)
             if dx != 0 or dy != 0:
                 b1.USR_resolve_collision(b2, (dx, dy))
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.cdivision(True)
+    @cython.initializedcheck(False)
+    cdef (double, double, double) edge_overlap(self, double[:, ::1] p1, int s1, int e1, double[:, ::1] p2, int s2, int e2):
+        """
+        Smallest overlap of the projections of p1 and p2 on the normals of
+        p1's edges, with that normal turned to push p2 away from p1.
+        Overlap is 0 if one of them separates the polygons.
+        The normals turn one way around p1, so the vertices holding the
+        extremes of the projections only move forward and are walked to
+        instead of searched, O(V1 + V2)
+        """
+        cdef int i, j, min1 = -1, min2 = 0, max2 = 0, step
+        cdef double a1 = signed_area(p1, s1, e1)
+        cdef double a2 = signed_area(p2, s2, e2)
+        cdef double ax, ay, l, hi1, lo1, lo2, hi2
+        cdef double depth = -1, nx = 0, ny = 0
+        if a1 == 0 or a2 == 0:
+            return 0, 0, 0
+        # Walk p2 in the direction the normals turn
+        step = 1 if (a1 > 0) == (a2 > 0) else -1
+        for i in range(s1, e1):
+            j = i + 1 if i + 1 < e1 else s1
+            # Outward normal of the edge
+            if a1 > 0:
+                ax = p1[j, 1] - p1[i, 1]
+                ay = p1[i, 0] - p1[j, 0]
+            else:
+                ax = p1[i, 1] - p1[j, 1]
+                ay = p1[j, 0] - p1[i, 0]
+            l = sqrt(ax * ax + ay * ay)
+            if l == 0:
+                continue
+            ax /= l
+            ay /= l
+            if min1 < 0:
+                min1 = lowest(p1, s1, e1, ax, ay)
+                min2 = lowest(p2, s2, e2, ax, ay)
+                max2 = lowest(p2, s2, e2, -ax, -ay)
+            else:
+                min1 = walk(p1, s1, e1, min1, 1, ax, ay)
+                min2 = walk(p2, s2, e2, min2, step, ax, ay)
+                max2 = walk(p2, s2, e2, max2, step, -ax, -ay)
+            # The edge itself is p1's highest point along it's normal
+            hi1 = p1[i, 0] * ax + p1[i, 1] * ay
+            lo1 = p1[min1, 0] * ax + p1[min1, 1] * ay
+            lo2 = p2[min2, 0] * ax + p2[min2, 1] * ay
+            hi2 = p2[max2, 0] * ax + p2[max2, 1] * ay
+            if hi1 - lo2 <= 0 or hi2 - lo1 <= 0:
+                return 0, 0, 0
+            if depth < 0 or hi1 - lo2 < depth:
+                depth = hi1 - lo2
+                nx = ax
+                ny = ay
+            if hi2 - lo1 < depth:
+                depth = hi2 - lo1
+                nx = -ax
+                ny = -ay
+        if depth < 0:
+            return 0, 0, 0
+        return nx, ny, depth
+
+    cdef (double, double, double) separating_axis(self, double[:, ::1] p1, int s1, int e1, double[:, ::1] p2, int s2, int e2):
+        """
+        Separating axis test of two convex polygons given as rows [s, e)
+        of p1 and p2 (x, y in the first two columns).
+        Returns the contact normal pointing from the first polygon to
+        the second and the penetration depth, depth is 0 if separated
+        """
+        cdef (double, double, double) a = self.edge_overlap(p1, s1, e1, p2, s2, e2)
+        if a[2] <= 0:
+            return 0, 0, 0
+        cdef (double, double, double) b = self.edge_overlap(p2, s2, e2, p1, s1, e1)
+        if b[2] <= 0:
+            return 0, 0, 0
+        # b pushes p1 away from p2
+        if a[2] <= b[2]:
+            return a
+        return -b[0], -b[1], b[2]
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.cdivision(True)
+    @cython.initializedcheck(False)
+    cdef void polygon_intersect(self, int body1, int body2):
+        """
+        Narrow phase of two bound bodies on the snapshot tables, resolved
+        once with the separating axis contact of their polygons
+        """
+        cdef Body b1 = <Body>self.bodies[body1]
+        cdef Body b2 = <Body>self.bodies[body2]
+        cdef (double, double, double) contact
+        if b1.is_round and b2.is_round:
+            if self.circle_intersect(b1, b2):
+                # Later pairs of this step read the resolved positions
+                self.snapshot_body(body1)
+                self.snapshot_body(body2)
+        elif b1.shape.vertex_count < 3 or b2.shape.vertex_count < 3:
+            # Segments (rays) have no area, keep the vertex against edge test
+            self.diagonal_intersect(b1, b2)
+            self.snapshot_body(body1)
+            self.snapshot_body(body2)
+        else:
+            contact = self.separating_axis(self.vertices, self.vertex_start[body1], self.vertex_start[body1 + 1],
+                                           self.vertices, self.vertex_start[body2], self.vertex_start[body2 + 1])
+            if contact[2] > 0:
+                b1.USR_resolve_collision(b2, (contact[0] * contact[2], contact[1] * contact[2]))
+                # The reverse pair is tested on the resolved positions
+                self.snapshot_body(body1)
+                self.snapshot_body(body2)
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.cdivision(True)
+    @cython.initializedcheck(False)
+    cdef void edge_intersect(self, int body1, Body b2, double[:, ::1] edges, int start, int end):
+        """
+        Same as polygon_intersect against a static body, b2's edges are
+        already baked into edges[start:end] as (x0, y0, x1, y1) rows
+        """
+        cdef (double, double, double) contact
+        if self.bodies[body1].is_round:
+            if self.circle_edge_intersect(body1, b2, edges, start, end):
+                self.snapshot_body(body1)
+            return
+        if self.bodies[body1].shape.vertex_count >= 3:
+            # Edge starts are b2's vertices in order
+            contact = self.separating_axis(self.vertices, self.vertex_start[body1], self.vertex_start[body1 + 1],
+                                           edges, start, end)
+            if contact[2] > 0:
+                (<Body>self.bodies[body1]).USR_resolve_collision(b2, (contact[0] * contact[2], contact[1] * contact[2]))
+                self.snapshot_body(body1)
+            return
+        cdef int i, j
+        cdef double dx = 0, dy = 0, val
+        cdef double l1sx = self.centers[body1, 0]
+        cdef double l1sy = self.centers[body1, 1]
+        cdef double l1ex, l1ey
+        for i in range(self.vertex_start[body1], self.vertex_start[body1 + 1]):
+            l1ex = self.vertices[i, 0]
+            l1ey = self.vertices[i, 1]
+            for j in range(start, end):
+                val = line_segment_intersect(l1sx, l1sy, l1ex, l1ey, edges[j, 0], edges[j, 1], edges[j, 2], edges[j, 3])
+                if val != 0:
+                    dx += (l1ex - l1sx) * (1 - val)
+                    dy += (l1ey - l1sy) * (1 - val)
+                    (<Body>self.bodies[body1]).USR_resolve_collision_point((l1ex - l1sx) * val, (l1ey - l1sy) * val)
+        if dx != 0 or dy != 0:
+            (<Body>self.bodies[body1]).USR_resolve_collision(b2, (dx, dy))
+            self.snapshot_body(body1)
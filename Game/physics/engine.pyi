@@ -1,7 +1,100 @@
+import numpy as np
 from Game.graphic.cartesian import CartesianPlane
+from Game.physics.world import World
+from Game.physics.body import Ball
 
 
 class EnginePolygon:
+    world: World
+    array_step: bool
+    sleep: bool
 
-    def __init__(self, plane: CartesianPlane, bodies: memoryview) -> None: ...
-    def step(self) -> None: ...
+    def __init__(self, plane: CartesianPlane, bodies: memoryview, cell_size: float = 0, array_step: bool = False, sleep: bool = False) -> None: ...
+    @property
+    def sleeping(self) -> np.ndarray:
+        """
+        @return
+        (bodies,) 1 for every sleeping body.
+        """
+        ...
+
+    @property
+    def static_edges(self) -> np.ndarray:
+        """
+        @return
+        (E, 4) x0, y0, x1, y1 of every baked static edge.
+        """
+        ...
+
+    def bake(self) -> None: ...
+    def step(self) -> None:
+        """
+        Steps every awake body, then resolves contacts against the baked
+        statics and the bodies of the neighbouring grid cells
+        """
+        ...
+    def state_size(self) -> int: ...
+    def save_state(self, out: np.ndarray, offset: int) -> int:
+        """
+        Writes every moving body's state and sleep counters into out[offset:].
+        @return
+        Offset after the written values.
+        """
+        ...
+
+    def load_state(self, state: np.ndarray, offset: int) -> int: ...
+    def possess(self, players: memoryview, ball: Ball, current: int) -> int:
+        """
+        Gives a free ball to the nearest player touching it (unless it just kicked it).
+        @return
+        Index of the player owning the ball, -1 if it's free.
+        """
+        ...
+
+    def observe(self, players: memoryview, out: np.ndarray) -> None:
+        """
+        out: (players, 5) x, y, direction, speed, has_ball of every player
+        """
+        ...
+
+    def cast_rays(self, bodies: memoryview, angles: np.ndarray, length: float, out: np.ndarray) -> None:
+        """
+        angles: Ray angles relative to the body heading
+        out: (bodies, angles) float32, hit distance divided by length, 1 for no hit
+        """
+        ...
+
+
+class EngineBatch:
+    size: int
+    player_count: int
+    world: World
+
+    def __init__(self, engines: np.ndarray, players: np.ndarray, balls: np.ndarray) -> None:
+        """
+        world: Batch world of every engine's rows if they all have array_step, None otherwise
+        """
+        ...
+
+    def step(self, controls: np.ndarray, active: np.ndarray = None) -> None:
+        """
+        controls: (N, players, 3) Acceleration, turn and kick power of every player
+        active: (N,) int32, only worlds with a non zero entry are stepped
+        Worlds are stepped one after another on the calling thread, only the
+        integration of the batch world releases the GIL. Use SubprocVecFootball
+        to step worlds on several cores.
+        """
+        ...
+
+    def observe(self, ball_out: np.ndarray, player_out: np.ndarray) -> None:
+        """
+        ball_out: (N, 5) x, y, direction, speed, is_out
+        player_out: (N, players, 5) x, y, direction, speed, has_ball
+        """
+        ...
+
+    def cast_rays(self, angles: np.ndarray, length: float, out: np.ndarray) -> None:
+        """
+        out: (N, players, angles) float32 ray hit distances of every player
+        """
+        ...
@@ -1,40 +1,730 @@
 import cython
-from Game.graphic.cartesian cimport CartesianPlane
-from Game.physics.body cimport Body, STATIC, FREE
+import numpy as np
+from Game.graphic.cartesian cimport CartesianPlane, Vector2d
+from Game.physics.body cimport Body, Ball, Player, STATIC, FREE
 from Game.physics.collision cimport collision
+from Game.physics.world cimport World, INTEGRATED, integrate_rows
+from Game.math.util cimport LSI
+from Game.math.core cimport point2d
+from libc.math cimport floor, cos, sin, sqrt
+
+# Quiet steps before a body falls asleep, the first one settles it's velocity
+cdef int SLEEP_STEPS = 2
 
 @cython.optimize.unpack_method_calls(False)
 cdef class EnginePolygon:
 
     cdef Body[:] bodies
     cdef collision collider
+    cdef readonly World world
+    cdef readonly bint array_step
+    # Uniform grid broad phase
+    cdef double cell_size
+    cdef int grid_w, grid_h
+    cdef int[:] body_cell
+    cdef int[:] cell_start
+    cdef int[:] cell_bodies
+    # Baked static geometry
+    cdef Body[:] statics
+    cdef double[:, ::1] static_edges
+    cdef int[::1] static_edge_start
+    cdef double[:, ::1] static_box
+    cdef double static_cell_size, static_x, static_y
+    cdef int static_w, static_h
+    cdef int[::1] static_cell_start
+    cdef int[::1] static_cell_bodies
+    cdef int[::1] static_stamp
+    cdef int[::1] static_candidates
+    cdef int stamp
+    # Sleeping bodies
+    cdef readonly bint sleep
+    cdef int[::1] sleeping
+    cdef int[::1] quiet_steps
+    cdef unsigned int[:, ::1] state_version
+    cdef list state_heads
 
-    def __init__(self, CartesianPlane plane, Body[:] bodies):
-        self.bodies = bodies
+    def __init__(self, CartesianPlane plane, Body[:] bodies, double cell_size=0, bint array_step=False, bint sleep=False):
+        """
+        cell_size: Grid cell size of the broad phase,
+                   0 means twice the biggest body radius (recomputed every step)
+        array_step: Integrate velocities and drag on the world arrays
+                    instead of calling every body's own step
+        sleep: Stop stepping bodies that stood still without contacts for
+               SLEEP_STEPS steps, two sleeping bodies are not tested against
+               each other. Any write to a sleeping body's position or velocity
+               (control, kick, reset, contact) wakes it up.
+        Free standing STATIC bodies are baked into an edge table once, they
+        are not stepped anymore, call bake() again if they are moved.
+        """
+        cdef int i
+        cdef list moving = []
+        cdef list statics = []
+        for i in range(bodies.shape[0]):
+            if bodies[i].type == STATIC and not bodies[i].is_attached:
+                statics.append(bodies[i])
+            else:
+                moving.append(bodies[i])
+        self.bodies = np.array(moving, dtype=Body)
+        self.statics = np.array(statics, dtype=Body)
         self.collider = collision(plane)
+        self.collider.bind(self.bodies)
+        self.world = World(self.bodies)
+        self.array_step = array_step
+        self.cell_size = cell_size
+        self.grid_w = 0
+        self.grid_h = 0
+        self.body_cell = np.zeros(moving.__len__(), dtype=np.int32)
+        self.cell_bodies = np.zeros(moving.__len__(), dtype=np.int32)
+        self.cell_start = np.zeros(2, dtype=np.int32)
+        self.sleep = sleep
+        self.sleeping = np.zeros(moving.__len__(), dtype=np.int32)
+        self.quiet_steps = np.zeros(moving.__len__(), dtype=np.int32)
+        self.state_version = np.zeros((moving.__len__(), 4), dtype=np.uint32)
+        self.state_heads = [None] * (moving.__len__() * 2)
+        self.bake()
+
+    @property
+    def sleeping(self):
+        """ (bodies,) 1 for every sleeping body """
+        return np.asarray(self.sleeping)
+
+    @property
+    def static_edges(self):
+        """ (E, 4) x0, y0, x1, y1 of every baked static edge """
+        return np.asarray(self.static_edges)
+
+    cpdef void bake(self):
+        """
+        Compiles static bodies into a flat edge table (engine plane coordinates)
+        and bins their bounding boxes into a fixed grid
+        """
+        cdef int s, i, v, cx, cy, cells
+        cdef int count = <int>self.statics.shape[0]
+        cdef Body b
+        cdef list edges = []
+        cdef (double, double) o
+        cdef (double, double) xy0
+        cdef (double, double) xy1
+        self.static_edge_start = np.zeros(count + 1, dtype=np.int32)
+        self.static_box = np.zeros((count, 4), dtype=np.float64)
+        self.static_stamp = np.zeros(count, dtype=np.int32)
+        self.static_candidates = np.zeros(count, dtype=np.int32)
+        self.stamp = 0
+        for s in range(count):
+            b = <Body>self.statics[s]
+            v = b.shape.vertex_count
+            o = b.shape.plane.get_origin(self.collider.plane)
+            for i in range(v):
+                xy0 = (o[0] + (<Vector2d>b.shape.vertices[i]).head.x.num, o[1] + (<Vector2d>b.shape.vertices[i]).head.y.num)
+                xy1 = (o[0] + (<Vector2d>b.shape.vertices[(i + 1) % v]).head.x.num, o[1] + (<Vector2d>b.shape.vertices[(i + 1) % v]).head.y.num)
+                edges.append((xy0[0], xy0[1], xy1[0], xy1[1]))
+                if i == 0 or xy0[0] < self.static_box[s, 0]:
+                    self.static_box[s, 0] = xy0[0]
+                if i == 0 or xy0[1] < self.static_box[s, 1]:
+                    self.static_box[s, 1] = xy0[1]
+                if i == 0 or xy0[0] > self.static_box[s, 2]:
+                    self.static_box[s, 2] = xy0[0]
+                if i == 0 or xy0[1] > self.static_box[s, 3]:
+                    self.static_box[s, 3] = xy0[1]
+            self.static_edge_start[s + 1] = self.static_edge_start[s] + v
+        self.static_edges = np.array(edges, dtype=np.float64).reshape(-1, 4)
+        boxes = np.asarray(self.static_box)
+        if count:
+            self.static_x = boxes[:, 0].min()
+            self.static_y = boxes[:, 1].min()
+            self.static_cell_size = max((boxes[:, 2] - boxes[:, 0]).max(), (boxes[:, 3] - boxes[:, 1]).max(), 1)
+            self.static_w = <int>floor((boxes[:, 2].max() - self.static_x) / self.static_cell_size) + 1
+            self.static_h = <int>floor((boxes[:, 3].max() - self.static_y) / self.static_cell_size) + 1
+        else:
+            self.static_x = self.static_y = 0
+            self.static_cell_size = 1
+            self.static_w = self.static_h = 0
+        # Every body goes into all the cells it's box overlaps
+        cells = self.static_w * self.static_h
+        cell_lists = [[] for _ in range(cells)]
+        for s in range(count):
+            for cy in range(self.static_cell(self.static_box[s, 1], self.static_y, self.static_h),
+                            self.static_cell(self.static_box[s, 3], self.static_y, self.static_h) + 1):
+                for cx in range(self.static_cell(self.static_box[s, 0], self.static_x, self.static_w),
+                                self.static_cell(self.static_box[s, 2], self.static_x, self.static_w) + 1):
+                    cell_lists[cy * self.static_w + cx].append(s)
+        self.static_cell_start = np.cumsum([0] + [cell.__len__() for cell in cell_lists], dtype=np.int32)
+        self.static_cell_bodies = np.array([s for cell in cell_lists for s in cell] or [0], dtype=np.int32)
+
+    @cython.cdivision(True)
+    cdef inline int static_cell(self, double v, double origin, int count):
+        cdef int c = <int>floor((v - origin) / self.static_cell_size)
+        if c < 0:
+            return 0
+        if c >= count:
+            return count - 1
+        return c
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef void step(self):
+        """
+        Steps every awake body first, then resolves contacts on the stepped
+        shapes: each body against the baked statics, then against the
+        bodies in the 3x3 grid cells around it (cell by cell, index order
+        inside a cell).
+        The old all-pairs loop stepped body i and resolved it's pairs
+        before stepping i + 1, so contacts saw a half stepped world and
+        trajectories differ from it. Stepping everything first is what lets
+        array_step and EngineBatch integrate all bodies in one pass.
+        """
+        self.step_begin()
+        if self.array_step:
+            self.world.integrate()
+        self.step_end()
 
     @cython.wraparound(False)
     @cython.boundscheck(False)
     @cython.nonecheck(False)
     @cython.initializedcheck(False)
-    def step(self):
+    cdef void step_begin(self):
+        """ Wakes bodies up and fills the world arrays, step() up to integrate """
         cdef int n = <int>self.bodies.shape[0]
-        cdef int i, j
-        cdef (double, double) dxy
+        cdef int i
+        if self.sleep:
+            for i in range(n):
+                if self.sleeping[i] and self.state_changed(i):
+                    self.sleeping[i] = 0
+                    self.quiet_steps[i] = 0
+        if self.array_step:
+            self.world.pull()
+            for i in range(n):
+                if self.sleeping[i]:
+                    self.world.flags[i] &= ~INTEGRATED
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cdef void step_end(self):
+        """ Rest of step() after the world arrays were integrated """
+        cdef int n = <int>self.bodies.shape[0]
+        cdef int i, j, k, cx, cy, c
+        # Take one gentle step in environment
+        if self.array_step:
+            self.world.push()
+            for i in range(n):
+                if self.sleeping[i]:
+                    continue
+                if self.world.flags[i] & INTEGRATED:
+                    (<Body>self.bodies[i]).USR_step_children()
+                else:
+                    (<Body>self.bodies[i]).step()
+        else:
+            for i in range(n):
+                if not self.sleeping[i]:
+                    (<Body>self.bodies[i]).step()
+        # Collisions are tested on the shapes as they are after stepping
+        self.collider.snapshot()
+        self.world.pull_kinematics()
+        self.build_grid()
+        if self.sleep:
+            for i in range(n):
+                if not self.sleeping[i]:
+                    self.keep_state(i)
         # Check every body ...
         for i in range(n):
-            # Take one gentle step in environment
-            (<Body>self.bodies[i]).step()
             # Will not check STATIC body
             if self.bodies[i].type == STATIC:
                 continue
-            # ... against every other body
+            # ... against the baked static geometry first, sleeping bodies did not move
+            if not self.sleeping[i]:
+                self.check_static(i)
+            c = self.body_cell[i]
+            # ... then against every body in the neighbouring cells
+            for cy in range(c // self.grid_w - 1, c // self.grid_w + 2):
+                if cy < 0 or cy >= self.grid_h:
+                    continue
+                for cx in range(c % self.grid_w - 1, c % self.grid_w + 2):
+                    if cx < 0 or cx >= self.grid_w:
+                        continue
+                    for k in range(self.cell_start[cy * self.grid_w + cx], self.cell_start[cy * self.grid_w + cx + 1]):
+                        j = self.cell_bodies[k]
+                        # Will not check bodies against itself
+                        # Bodies that have same id will be skipped
+                        if i == j or self.bodies[i].id == self.bodies[j].id:
+                            continue
+                        # Two sleeping bodies did not touch when they fell asleep
+                        if self.sleeping[i] and self.sleeping[j]:
+                            continue
+                        # radius1 + radius2 >= distance between body2 and body1 means we have some work to do
+                        if (self.bodies[i].radius + self.bodies[j].radius) >= ((<Body>self.bodies[i]).shape.plane.parent_vector.dist((<Body>self.bodies[j]).shape.plane.parent_vector)):
+                            self.collider.polygon_intersect(i, j)
+        if self.sleep:
+            self.update_sleep()
+        # Leave the arrays describing the resolved world
+        self.world.pull()
+
+    cpdef int state_size(self):
+        """ Number of doubles save_state writes """
+        cdef int i, size = 2 * <int>self.bodies.shape[0]
+        for i in range(self.bodies.shape[0]):
+            size += (<Body>self.bodies[i]).state_size()
+        return size
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef int save_state(self, double[::1] out, int offset):
+        """
+        Writes the state of every moving body and the sleep counters at
+        offset, returns the offset after them. Baked statics are not saved.
+        """
+        cdef int i
+        for i in range(self.bodies.shape[0]):
+            offset = (<Body>self.bodies[i]).save_state(out, offset)
+            out[offset] = self.sleeping[i]
+            out[offset + 1] = self.quiet_steps[i]
+            offset += 2
+        return offset
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef int load_state(self, const double[::1] state, int offset):
+        """ Reverse of save_state, the world arrays are pulled again """
+        cdef int i
+        for i in range(self.bodies.shape[0]):
+            offset = (<Body>self.bodies[i]).load_state(state, offset)
+            self.sleeping[i] = <int>state[offset]
+            self.quiet_steps[i] = <int>state[offset + 1]
+            offset += 2
+        # Loaded values are not a wake up
+        for i in range(self.bodies.shape[0]):
+            self.keep_state(i)
+        self.collider.snapshot()
+        self.world.pull()
+        return offset
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    @cython.cdivision(True)
+    cdef void update_sleep(self):
+        """
+        Bodies that are not moving (same speed test as USR_step) and were not
+        written to by a collision count quiet steps, touched sleeping bodies wake up
+        """
+        cdef int i
+        cdef Body b
+        for i in range(self.bodies.shape[0]):
+            b = <Body>self.bodies[i]
+            if self.state_changed(i):
+                self.sleeping[i] = 0
+                self.quiet_steps[i] = 0
+            elif not self.sleeping[i]:
+                if b.type == STATIC or floor(b.velocity.mag() * 1000.0) / 1000.0 > 1:
+                    self.quiet_steps[i] = 0
+                else:
+                    self.quiet_steps[i] += 1
+                    if self.quiet_steps[i] >= SLEEP_STEPS:
+                        self.sleeping[i] = 1
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cdef void keep_state(self, int i):
+        """ Remembers the write versions of body i's position and velocity """
+        cdef Body b = <Body>self.bodies[i]
+        cdef point2d position = b.shape.plane.parent_vector.head
+        cdef point2d velocity = b.velocity.head
+        self.state_heads[i * 2] = position
+        self.state_heads[i * 2 + 1] = velocity
+        self.state_version[i, 0] = position.x.version
+        self.state_version[i, 1] = position.y.version
+        self.state_version[i, 2] = velocity.x.version
+        self.state_version[i, 3] = velocity.y.version
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cdef bint state_changed(self, int i):
+        """ True if body i's position or velocity was written since keep_state """
+        cdef Body b = <Body>self.bodies[i]
+        cdef point2d position = b.shape.plane.parent_vector.head
+        cdef point2d velocity = b.velocity.head
+        return position is not self.state_heads[i * 2] or velocity is not self.state_heads[i * 2 + 1] or \
+            position.x.version != self.state_version[i, 0] or position.y.version != self.state_version[i, 1] or \
+            velocity.x.version != self.state_version[i, 2] or velocity.y.version != self.state_version[i, 3]
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cdef void check_static(self, int i):
+        """
+        Tests body i against every static body whose box overlaps
+        it's own bounding box (position +- radius)
+        """
+        cdef int k, s
+        cdef int count = self.query_static(self.world.position[i, 0], self.world.position[i, 1], self.world.radius[i])
+        for k in range(count):
+            s = self.static_candidates[k]
+            if self.bodies[i].id == self.statics[s].id:
+                continue
+            self.collider.edge_intersect(i, <Body>self.statics[s], self.static_edges,
+                                         self.static_edge_start[s], self.static_edge_start[s + 1])
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cdef int query_static(self, double x, double y, double r):
+        """
+        Fills static_candidates with the static bodies whose box overlaps
+        the box (x +- r, y +- r) in the original body order, returns the count
+        """
+        cdef int cx, cy, k, s, t, count = 0
+        if self.static_w == 0 or \
+                x + r < self.static_x or y + r < self.static_y or \
+                x - r > self.static_x + self.static_w * self.static_cell_size or \
+                y - r > self.static_y + self.static_h * self.static_cell_size:
+            return 0
+        if self.stamp == 2147483647:
+            self.stamp = 0
+            self.static_stamp[:] = 0
+        self.stamp += 1
+        for cy in range(self.static_cell(y - r, self.static_y, self.static_h), self.static_cell(y + r, self.static_y, self.static_h) + 1):
+            for cx in range(self.static_cell(x - r, self.static_x, self.static_w), self.static_cell(x + r, self.static_x, self.static_w) + 1):
+                for k in range(self.static_cell_start[cy * self.static_w + cx], self.static_cell_start[cy * self.static_w + cx + 1]):
+                    s = self.static_cell_bodies[k]
+                    if self.static_stamp[s] == self.stamp:
+                        continue
+                    self.static_stamp[s] = self.stamp
+                    if x + r < self.static_box[s, 0] or x - r > self.static_box[s, 2] or \
+                            y + r < self.static_box[s, 1] or y - r > self.static_box[s, 3]:
+                        continue
+                    # Keep the bodies order, same as the old pair loop
+                    t = count
+                    while t > 0 and self.static_candidates[t - 1] > s:
+                        self.static_candidates[t] = self.static_candidates[t - 1]
+                        t -= 1
+                    self.static_candidates[t] = s
+                    count += 1
+        return count
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef int possess(self, Body[:] players, Ball ball, int current):
+        """
+        A free ball is taken by the nearest player touching it, unless that
+        player just kicked it. Players not touching the ball can kick again.
+        current: Owner index from the last call
+        Returns the index of the player owning the ball, -1 if it's free
+        """
+        cdef int i, owner = -1
+        cdef double dx, dy, d, nearest = 0
+        cdef Player player
+        cdef (double, double) xy
+        cdef (double, double) ball_xy
+        if not ball.is_free:
+            # Possession can change hands in a contact
+            for i in range(players.shape[0]):
+                if (<Player>players[i]).has_ball:
+                    return i
+            return current
+        ball_xy = ball.position()
+        for i in range(players.shape[0]):
+            player = <Player>players[i]
+            xy = player.position()
+            dx = xy[0] - ball_xy[0]
+            dy = xy[1] - ball_xy[1]
+            d = sqrt(dx * dx + dy * dy)
+            if d <= player.radius + ball.radius:
+                if owner == -1 or d < nearest:
+                    owner = i
+                    nearest = d
+            else:
+                player.kicked = False
+        if owner == -1:
+            return -1
+        player = <Player>players[owner]
+        if player.kicked:
+            return -1
+        ball.is_free = False
+        ball.velocity.set_head_ref(player.velocity.get_head_ref())
+        ball.shape.plane.parent_vector.set_head_ref(player.shape.plane.parent_vector.get_head_ref())
+        player.has_ball = True
+        player.velocity.max = player.PLAYER_SPEED_BALL
+        return owner
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef void observe(self, Body[:] players, double[:, :] out):
+        """
+        out: (players, 5) x, y, direction, speed, has_ball of every player
+        """
+        cdef int p
+        cdef Player player
+        cdef (double, double) xy
+        for p in range(players.shape[0]):
+            player = <Player>players[p]
+            xy = player.position()
+            out[p, 0] = xy[0]
+            out[p, 1] = xy[1]
+            out[p, 2] = player.direction()
+            out[p, 3] = player.speed()
+            out[p, 4] = player.has_ball
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    @cython.cdivision(True)
+    cpdef void cast_rays(self, Body[:] bodies, double[::1] angles, double length, float[:, ::1] out):
+        """
+        Casts a ray of the given length for every angle (relative to the body
+        heading) from every body, against the static edges and the edges of
+        every non FREE body with a different id
+        out: (bodies, angles) Hit distance divided by length, 1 for no hit
+        """
+        cdef int n = <int>self.bodies.shape[0]
+        cdef int p, r, j, e, k, s, v, count
+        cdef Body b
+        cdef double ox, oy, ex, ey, heading, t
+        cdef (double, double) xy
+        cdef double[:, ::1] centers = self.collider.centers
+        cdef double[:, ::1] vertices = self.collider.vertices
+        cdef int[::1] vertex_start = self.collider.vertex_start
+        # Moving bodies are tested as they were at the last collision test
+        for p in range(bodies.shape[0]):
+            b = <Body>bodies[p]
+            xy = b.shape.plane.get_origin(self.collider.plane)
             for j in range(n):
-                # Will not check bodies against itself
-                # Will not check against FREE body
-                # Bodies that have same id will be skipped
-                if i == j or self.bodies[j].type == FREE or self.bodies[i].id == self.bodies[j].id:
+                if self.bodies[j] is b:
+                    xy = (centers[j, 0], centers[j, 1])
+                    break
+            ox = xy[0]
+            oy = xy[1]
+            heading = b.velocity.dir()
+            count = self.query_static(ox, oy, length)
+            for r in range(angles.shape[0]):
+                out[p, r] = 1
+                ex = ox + cos(heading + angles[r]) * length
+                ey = oy + sin(heading + angles[r]) * length
+                for k in range(count):
+                    s = self.static_candidates[k]
+                    if self.statics[s].id == b.id:
+                        continue
+                    for e in range(self.static_edge_start[s], self.static_edge_start[s + 1]):
+                        t = LSI(ox, oy, ex, ey, self.static_edges[e, 0], self.static_edges[e, 1], self.static_edges[e, 2], self.static_edges[e, 3])
+                        if t != 0 and t < out[p, r]:
+                            out[p, r] = t
+                for j in range(n):
+                    if self.bodies[j].type == FREE or self.bodies[j].id == b.id:
+                        continue
+                    if (centers[j, 0] - ox) * (centers[j, 0] - ox) + (centers[j, 1] - oy) * (centers[j, 1] - oy) > \
+                            (length + self.bodies[j].radius) * (length + self.bodies[j].radius):
+                        continue
+                    v = vertex_start[j + 1] - vertex_start[j]
+                    k = vertex_start[j]
+                    for e in range(v):
+                        t = LSI(ox, oy, ex, ey,
+                                vertices[k + e, 0], vertices[k + e, 1],
+                                vertices[k + (e + 1) % v, 0], vertices[k + (e + 1) % v, 1])
+                        if t != 0 and t < out[p, r]:
+                            out[p, r] = t
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    @cython.cdivision(True)
+    cdef void build_grid(self):
+        """
+        Bins every non FREE body into a uniform grid (counting sort),
+        FREE bodies are never collided against so they are left out.
+        """
+        cdef int n = <int>self.bodies.shape[0]
+        cdef int i, c, cells
+        cdef double x_min = 0, y_min = 0, x_max = 0, y_max = 0, r_max = 0
+        cdef double cs, x, y
+        for i in range(n):
+            x = self.world.position[i, 0]
+            y = self.world.position[i, 1]
+            if i == 0 or x < x_min:
+                x_min = x
+            if i == 0 or x > x_max:
+                x_max = x
+            if i == 0 or y < y_min:
+                y_min = y
+            if i == 0 or y > y_max:
+                y_max = y
+            if self.world.radius[i] > r_max:
+                r_max = self.world.radius[i]
+        cs = self.cell_size if self.cell_size > 0 else 2 * r_max
+        if cs <= 0:
+            cs = 1
+        self.grid_w = <int>floor((x_max - x_min) / cs) + 1
+        self.grid_h = <int>floor((y_max - y_min) / cs) + 1
+        # A body flung far away should not blow up the grid
+        while self.grid_w * self.grid_h > 4 * n + 64:
+            cs *= 2
+            self.grid_w = <int>floor((x_max - x_min) / cs) + 1
+            self.grid_h = <int>floor((y_max - y_min) / cs) + 1
+        cells = self.grid_w * self.grid_h
+        if self.cell_start.shape[0] < cells + 1:
+            self.cell_start = np.zeros(cells + 1, dtype=np.int32)
+        for c in range(cells + 1):
+            self.cell_start[c] = 0
+        for i in range(n):
+            c = <int>floor((self.world.position[i, 1] - y_min) / cs) * self.grid_w + <int>floor((self.world.position[i, 0] - x_min) / cs)
+            self.body_cell[i] = c
+            if self.world.type[i] != FREE:
+                self.cell_start[c + 1] += 1
+        for c in range(cells):
+            self.cell_start[c + 1] += self.cell_start[c]
+        # Bodies keep their original order inside a cell
+        for i in range(n):
+            if self.world.type[i] != FREE:
+                c = self.body_cell[i]
+                self.cell_bodies[self.cell_start[c]] = i
+                self.cell_start[c] += 1
+        for c in range(cells, 0, -1):
+            self.cell_start[c] = self.cell_start[c - 1]
+        self.cell_start[0] = 0
+
+
+@cython.optimize.unpack_method_calls(False)
+cdef class EngineBatch:
+
+    cdef EnginePolygon[:] engines
+    cdef Body[:, :] players
+    cdef Ball[:] balls
+    cdef readonly int size, player_count
+    # Arrays of every world stacked, None unless every engine uses array_step
+    cdef readonly World world
+    cdef int[::1] world_start
+
+    def __init__(self, EnginePolygon[:] engines, Body[:, :] players, Ball[:] balls):
+        """
+        Independent worlds with identical layouts
+        engines: (N,) Engine of every world
+        players: (N, players) Controlled players of every world
+        balls: (N,) Ball of every world
+        If every engine has array_step their world arrays are rows of one
+        batch world, integrated in one pass
+        """
+        cdef int w
+        cdef EnginePolygon engine
+        if engines.shape[0] != players.shape[0] or engines.shape[0] != balls.shape[0]:
+            raise ValueError("Every world needs an engine, players and a ball")
+        self.engines = engines
+        self.players = players
+        self.balls = balls
+        self.size = <int>engines.shape[0]
+        self.player_count = <int>players.shape[1]
+        self.world = None
+        if all([(<EnginePolygon>self.engines[w]).array_step for w in range(self.size)]):
+            self.world = World(np.concatenate([np.asarray((<EnginePolygon>self.engines[w]).bodies) for w in range(self.size)]))
+            self.world_start = np.cumsum([0] + [(<EnginePolygon>self.engines[w]).world.size for w in range(self.size)], dtype=np.int32)
+            for w in range(self.size):
+                engine = <EnginePolygon>self.engines[w]
+                engine.world.share(self.world, self.world_start[w])
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef void step(self, double[:, :, :] controls, int[::1] active=None):
+        """
+        controls: (N, players, 3) Acceleration, turn and kick power of every player
+        active: (N,) Only worlds with a non zero entry are stepped, all if None
+        """
+        cdef int w, p
+        cdef bint masked = active is not None
+        if self.world is None:
+            for w in range(self.size):
+                if masked and not active[w]:
                     continue
-                # radius1 + radius2 >= distance between body2 and body1 means we have some work to do
-                if (self.bodies[i].radius + self.bodies[j].radius) >= ((<Body>self.bodies[i]).shape.plane.parent_vector.dist((<Body>self.bodies[j]).shape.plane.parent_vector)):
-                    self.collider.check(<Body>self.bodies[i], <Body>self.bodies[j])
+                for p in range(self.player_count):
+                    (<Player>self.players[w, p]).control(controls[w, p, 0], controls[w, p, 1], controls[w, p, 2], <Ball>self.balls[w])
+                (<EnginePolygon>self.engines[w]).step()
+                (<Ball>self.balls[w]).step()
+            return
+        # Same as above in three passes, the middle one integrates every world at once.
+        # Only it runs without the GIL, contacts and controls work on the body objects
+        # so the worlds are stepped serially, SubprocVecFootball uses processes.
+        # Stepping the worlds on threads would need contacts, controls and the ball
+        # check ported to the world arrays first
+        for w in range(self.size):
+            if masked and not active[w]:
+                continue
+            for p in range(self.player_count):
+                (<Player>self.players[w, p]).control(controls[w, p, 0], controls[w, p, 1], controls[w, p, 2], <Ball>self.balls[w])
+            (<EnginePolygon>self.engines[w]).step_begin()
+        self.integrate(active)
+        for w in range(self.size):
+            if masked and not active[w]:
+                continue
+            (<EnginePolygon>self.engines[w]).step_end()
+            (<Ball>self.balls[w]).step()
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cdef void integrate(self, int[::1] active):
+        """ World.integrate of every active world, one call over the stacked rows if all are """
+        cdef int w
+        cdef World world = self.world
+        cdef int[::1] start = self.world_start
+        with nogil:
+            if active is None:
+                integrate_rows(world.position, world.velocity, world.heading, world.speed_min, world.speed_max,
+                               world.drag_coef, world.frame_rate, world.flags, 0, start[self.size])
+                return
+            for w in range(self.size):
+                if active[w]:
+                    integrate_rows(world.position, world.velocity, world.heading, world.speed_min, world.speed_max,
+                                   world.drag_coef, world.frame_rate, world.flags, start[w], start[w + 1])
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef void observe(self, double[:, :] ball_out, double[:, :, :] player_out):
+        """
+        ball_out: (N, 5) x, y, direction, speed, is_out
+        player_out: (N, players, 5) x, y, direction, speed, has_ball
+        """
+        cdef int w
+        cdef Ball ball
+        cdef (double, double) xy
+        for w in range(self.size):
+            ball = <Ball>self.balls[w]
+            xy = ball.position()
+            ball_out[w, 0] = xy[0]
+            ball_out[w, 1] = xy[1]
+            ball_out[w, 2] = ball.direction()
+            ball_out[w, 3] = ball.speed()
+            ball_out[w, 4] = ball.is_out
+            (<EnginePolygon>self.engines[w]).observe(self.players[w], player_out[w])
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef void cast_rays(self, double[::1] angles, double length, float[:, :, ::1] out):
+        """
+        out: (N, players, angles) Ray hit distances of every player, see EnginePolygon.cast_rays
+        """
+        cdef int w
+        for w in range(self.size):
+            (<EnginePolygon>self.engines[w]).cast_rays(self.players[w], angles, length, out[w])
@@ -0,0 +1,30 @@
+from Game.physics.body cimport Body
+
+
+cdef int ATTACHED, FOLLOWING, INTEGRATED
+
+
+cdef class World:
+    cdef Body[:] bodies
+    cdef readonly int size
+    cdef double[:, ::1] position
+    cdef double[:, ::1] velocity
+    cdef double[::1] heading
+    cdef double[::1] radius
+    cdef double[::1] speed_min
+    cdef double[::1] speed_max
+    cdef double[::1] drag_coef
+    cdef double[::1] frame_rate
+    cdef int[::1] type
+    cdef int[::1] flags
+
+    cdef void share(self, World batch, int start)
+    cpdef void pull_kinematics(self)
+    cpdef void pull(self)
+    cpdef void push(self)
+    cpdef void integrate(self)
+
+
+cdef void integrate_rows(double[:, ::1] position, double[:, ::1] velocity, double[::1] heading,
+                         double[::1] speed_min, double[::1] speed_max, double[::1] drag_coef,
+                         double[::1] frame_rate, int[::1] flags, int start, int end) noexcept nogil
\ No newline at end of file
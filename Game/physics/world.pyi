@@ -0,0 +1,53 @@
+import numpy as np
+from Game.physics.body import Body
+
+
+ATTACHED: int
+FOLLOWING: int
+INTEGRATED: int
+
+
+class World:
+    """
+    Copy of the bodies in arrays, bodies stay the state of the world.
+    pull() copies them in, push() writes integrated rows back, writes to the
+    arrays don't reach the bodies (the properties are read only views).
+    EnginePolygon pulls after every step and load_state.
+    """
+    size: int
+
+    def __init__(self, bodies: memoryview) -> None: ...
+    @property
+    def position(self) -> np.ndarray:
+        """
+        @return
+        (size, 2) Body positions in Cartesian space.
+        """
+        ...
+
+    @property
+    def velocity(self) -> np.ndarray: ...
+    @property
+    def heading(self) -> np.ndarray:
+        """
+        @return
+        (size,) Velocity directions in radians.
+        """
+        ...
+
+    @property
+    def radius(self) -> np.ndarray: ...
+    @property
+    def type(self) -> np.ndarray: ...
+    @property
+    def flags(self) -> np.ndarray: ...
+    def pull_kinematics(self) -> None:
+        """ Copy body positions, velocities and headings into the arrays """
+        ...
+
+    def pull(self) -> None:
+        """ Copy body states into the arrays """
+        ...
+
+    def push(self) -> None: ...
+    def integrate(self) -> None: ...
@@ -0,0 +1,206 @@
+import cython
+import numpy as np
+from Game.physics.body cimport Body
+from libc.math cimport floor, sqrt, cos, sin, atan2
+from libc.math cimport fabs
+
+ATTACHED = 1
+FOLLOWING = 2
+INTEGRATED = 4
+
+cdef object read_only(array):
+    """ ndarray view of a memoryview that can not be written through """
+    out = np.asarray(array)
+    out.flags.writeable = False
+    return out
+
+
+@cython.optimize.unpack_method_calls(False)
+cdef class World:
+    """
+    Copy of the bodies' kinematics and properties in arrays. The bodies stay
+    the state of the world (attach and kick share point references between
+    them), pull() copies them into the arrays and push() writes integrated
+    rows back, nothing else flows from the arrays to the bodies.
+    EnginePolygon pulls after every step and load_state, a body moved in
+    between is seen at the next pull. The properties are read only views.
+    """
+
+    def __cinit__(self, *args, **kwargs):
+        self.size = 0
+
+    def __init__(self, Body[:] bodies):
+        self.bodies = bodies
+        self.size = <int>bodies.shape[0]
+        self.position = np.zeros((self.size, 2), dtype=np.float64)
+        self.velocity = np.zeros((self.size, 2), dtype=np.float64)
+        self.heading = np.zeros(self.size, dtype=np.float64)
+        self.radius = np.zeros(self.size, dtype=np.float64)
+        self.speed_min = np.zeros(self.size, dtype=np.float64)
+        self.speed_max = np.zeros(self.size, dtype=np.float64)
+        self.drag_coef = np.zeros(self.size, dtype=np.float64)
+        self.frame_rate = np.zeros(self.size, dtype=np.float64)
+        self.type = np.zeros(self.size, dtype=np.int32)
+        self.flags = np.zeros(self.size, dtype=np.int32)
+        self.pull()
+
+    @property
+    def position(self):
+        return read_only(self.position)
+
+    @property
+    def velocity(self):
+        return read_only(self.velocity)
+
+    @property
+    def heading(self):
+        return read_only(self.heading)
+
+    @property
+    def radius(self):
+        return read_only(self.radius)
+
+    @property
+    def type(self):
+        return read_only(self.type)
+
+    @property
+    def flags(self):
+        return read_only(self.flags)
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef void pull_kinematics(self):
+        """ Copy body positions, velocities and headings into the arrays """
+        cdef int i
+        cdef Body b
+        for i in range(self.size):
+            b = <Body>self.bodies[i]
+            self.position[i, 0] = b.shape.plane.parent_vector.head.x.num
+            self.position[i, 1] = b.shape.plane.parent_vector.head.y.num
+            self.velocity[i, 0] = b.velocity.head.x.num
+            self.velocity[i, 1] = b.velocity.head.y.num
+            self.heading[i] = atan2(b.velocity.head.y.num, b.velocity.head.x.num)
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef void pull(self):
+        """ Copy body states into the arrays """
+        cdef int i, f
+        cdef Body b
+        self.pull_kinematics()
+        for i in range(self.size):
+            b = <Body>self.bodies[i]
+            self.radius[i] = b.radius
+            self.speed_min[i] = b.velocity.min
+            self.speed_max[i] = b.velocity.max
+            self.drag_coef[i] = b.drag_coef
+            self.frame_rate[i] = b.shape.plane.frame_rate
+            self.type[i] = b.type
+            f = 0
+            if b.is_attached:
+                f |= ATTACHED
+                if b.is_following_dir:
+                    f |= FOLLOWING
+            if b.is_integrable and not (f & FOLLOWING):
+                f |= INTEGRATED
+            self.flags[i] = f
+
+    @cython.wraparound(False)
+    @cython.boundscheck(False)
+    @cython.nonecheck(False)
+    @cython.initializedcheck(False)
+    cpdef void push(self):
+        """ Copy integrated states back into the bodies """
+        cdef int i
+        cdef Body b
+        for i in range(self.size):
+            if not (self.flags[i] & INTEGRATED):
+                continue
+            b = <Body>self.bodies[i]
+            b.velocity.head.set_xy((self.velocity[i, 0], self.velocity[i, 1]))
+            # Attached bodies share their position with the parent
+            if not (self.flags[i] & ATTACHED):
+                b.shape.plane.parent_vector.head.set_xy((self.position[i, 0], self.position[i, 1]))
+
+    cdef void share(self, World batch, int start):
+        """
+        Use rows [start, start + size) of batch's arrays as this world's
+        arrays, so the worlds of a batch can be integrated in one call
+        """
+        self.position = batch.position[start:start + self.size]
+        self.velocity = batch.velocity[start:start + self.size]
+        self.heading = batch.heading[start:start + self.size]
+        self.radius = batch.radius[start:start + self.size]
+        self.speed_min = batch.speed_min[start:start + self.size]
+        self.speed_max = batch.speed_max[start:start + self.size]
+        self.drag_coef = batch.drag_coef[start:start + self.size]
+        self.frame_rate = batch.frame_rate[start:start + self.size]
+        self.type = batch.type[start:start + self.size]
+        self.flags = batch.flags[start:start + self.size]
+        self.pull()
+
+    cpdef void integrate(self):
+        """ Same velocity integration and drag as Body.USR_step, on the arrays """
+        with nogil:
+            integrate_rows(self.position, self.velocity, self.heading, self.speed_min, self.speed_max,
+                           self.drag_coef, self.frame_rate, self.flags, 0, self.size)
+
+
+@cython.wraparound(False)
+@cython.boundscheck(False)
+@cython.initializedcheck(False)
+@cython.cdivision(True)
+cdef void integrate_rows(double[:, ::1] position, double[:, ::1] velocity, double[::1] heading,
+                         double[::1] speed_min, double[::1] speed_max, double[::1] drag_coef,
+                         double[::1] frame_rate, int[::1] flags, int start, int end) noexcept nogil:
+    """ World.integrate of rows [start, end), touches no python object """
+    cdef int i
+    cdef double vx, vy, v_mag, v_len, a, o
+    for i in range(start, end):
+        if not (flags[i] & INTEGRATED):
+            continue
+        vx = velocity[i, 0]
+        vy = velocity[i, 1]
+        v_mag = sqrt(vx * vx + vy * vy)
+        v_len = floor(v_mag * 1000.0) / 1000.0
+        a = atan2(vy, vx)
+        if v_len > 1:
+            if not (flags[i] & ATTACHED):
+                position[i, 0] += (vx - cos(a)) / frame_rate[i]
+                position[i, 1] += (vy - sin(a)) / frame_rate[i]
+            # Drag is applied even if it's attached to another body
+            if drag_coef[i]:
+                o = (1 - v_len) * drag_coef[i]
+                if o > 0:
+                    if speed_max[i] and (v_mag + o) > speed_max[i]:
+                        vx = cos(a) * speed_max[i]
+                        vy = sin(a) * speed_max[i]
+                    else:
+                        vx += o * cos(a)
+                        vy += o * sin(a)
+                elif o < 0:
+                    if fabs(o) < (v_mag - speed_min[i]):
+                        vx += o * cos(a)
+                        vy += o * sin(a)
+                    else:
+                        vx = cos(a) * speed_min[i]
+                        vy = sin(a) * speed_min[i]
+        else:
+            # Unit vector, clamped the same way as vector2d.set_head
+            if 1 < speed_min[i]:
+                vx = cos(a) * speed_min[i]
+                vy = sin(a) * speed_min[i]
+            elif speed_max[i] and 1 > speed_max[i]:
+                vx = cos(a) * speed_max[i]
+                vy = sin(a) * speed_max[i]
+            else:
+                vx = cos(a)
+                vy = sin(a)
+        velocity[i, 0] = vx
+        velocity[i, 1] = vy
+        heading[i] = atan2(vy, vx)
@@ -5,3 +5,4 @@ from .dqn import DeepQNetworkAgent
 from .reinforce import ReinforceAgent
 from .actor_critic import ActorCriticAgent
 from .ddpg import DeepDeterministicPolicyGradientAgent
+from .half_agent import HalfAgent
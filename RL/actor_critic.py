@@ -5,6 +5,7 @@ from .deep_agent import DeepAgent
 
 
 class ActorCriticAgent(DeepAgent):
+    rollout_fields = DeepAgent.rollout_fields + ('env_count', 'state_buffer', 'action_buffer', 'reward_buffer')
 
     def __init__(self, state_space_size: int, action_space_size: int, device: str = 'cpu') -> None:
         super().__init__(state_space_size, action_space_size, device)
@@ -46,7 +47,7 @@ class ActorCriticAgent(DeepAgent):
         self.critic.train()
         self.actor_optimizer = torch.optim.Adam(self.actor.parameters(), lr=actor_lr)
         self.critic_optimizer = torch.optim.Adam(self.critic.parameters(), lr=critic_lr)
-        self.state_buffer = np.zeros((env_count, step_count, self.state_space_size))
+        self.state_buffer = np.zeros((env_count, step_count, self.state_space_size), dtype=np.float32)
         self.action_buffer = np.zeros((env_count, step_count))
         self.reward_buffer = np.zeros((env_count, step_count))
 
@@ -55,9 +56,9 @@ class ActorCriticAgent(DeepAgent):
         self.step_counter += 1
         self.actor.eval()
         if state.ndim == 1:
-            state = torch.tensor(state).float().unsqueeze(0).to(self.device)
+            state = self.to_tensor(state).unsqueeze(0)
         else:
-            state = torch.tensor(state).float().to(self.device)
+            state = self.to_tensor(state)
         probs = self.actor(state)
         distribution = Categorical(probs)
         action = distribution.sample()
@@ -80,10 +81,10 @@ class ActorCriticAgent(DeepAgent):
         self.train_count += 1
         self.actor.train()
 
-        states = torch.tensor(self.state_buffer[:, :self.step_counter]).float().to(self.device)
+        states = self.to_tensor(self.state_buffer[:, :self.step_counter])
         actions = torch.tensor(self.action_buffer[:, :self.step_counter]).to(self.device)
         rewards = torch.tensor(self.reward_buffer[:, :self.step_counter]).float().to(self.device)
-        last_states = torch.tensor(last_states).float().to(self.device)
+        last_states = self.to_tensor(last_states)
         dones = 1 - torch.tensor(dones).to(self.device)
         rewards /= self.reward_norm_factor
         actor_losses = []
@@ -1,4 +1,6 @@
 class Agent:
+    # Attributes carried from policy to learn for the envs being stepped, see HalfAgent
+    rollout_fields = ('step_counter', 'rewards')
 
     def __init__(self, state_space_size: int, action_space_size: int) -> None:
         self.state_space_size = state_space_size
@@ -86,9 +86,9 @@ class DeepDeterministicPolicyGradientAgent(DeepAgent):
         self.train_count += 1
         s, a, ns, r, d = self.buffer.sample(self.batch)
         r /= self.reward_norm_factor
-        states = torch.tensor(s).float().to(self.device)
+        states = self.to_tensor(s)
         actions = torch.tensor(a).float().view(self.batch, self.action_space_size).to(self.device)
-        next_states = torch.tensor(ns).float().to(self.device)
+        next_states = self.to_tensor(ns)
         rewards = torch.tensor(r).float().view(self.batch, 1).to(self.device)
         dones = torch.tensor(d).float().view(self.batch, 1).to(self.device)
 
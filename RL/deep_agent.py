@@ -1,4 +1,5 @@
 import os
+import numpy as np
 import torch
 from .agent import Agent
 
@@ -18,6 +19,10 @@ class DeepAgent(Agent):
     def eval(self):
         pass
 
+    def to_tensor(self, x) -> torch.Tensor:
+        """ float32 tensor on device, shares memory with x if it's already a float32 array and device is cpu """
+        return torch.from_numpy(np.asarray(x, dtype=np.float32)).to(self.device)
+
     def create_model(self, model: torch.nn.Module, lr: float, gamma: float):
         self.lr = lr
         self.gamma = gamma
@@ -5,12 +5,16 @@ from .utils import ReplayBufferBase
 
 
 class DeepQNetworkAgent(DeepAgent):
+    rollout_fields = DeepAgent.rollout_fields + ('env_e', 'env_rewards')
 
     def __init__(self, state_space_size: int, action_space_size: int, device: str = 'cpu') -> None:
         super().__init__(state_space_size, action_space_size, device)
         self.e = 1
         self.e_min = 0.01
         self.e_decay = 0.999999
+        # Per env exploration rates of batched states, e for every env if None
+        self.env_e = None
+        self.env_rewards = None
         self.target_model = None
         self.buffer = None
         self.batch = 0
@@ -47,18 +51,40 @@ class DeepQNetworkAgent(DeepAgent):
         self.target_model.to(self.device)
         self.target_model.eval()
 
+    def create_env_epsilons(self, env_count: int, base: float = 0.4, alpha: float = 7.0):
+        """
+        Fixed exploration rate of every env for batched states,
+        env i explores with base ** (1 + alpha * i / (env_count - 1))
+        """
+        i = np.arange(env_count)
+        self.env_e = base ** (1 + alpha * i / max(env_count - 1, 1))
+
     @torch.no_grad()
     def policy(self, state: np.ndarray):
+        """ state: (state,) or (N, state) batch, returns (1,) or (N,) actions """
         self.step_counter += 1
         self.model.eval()
-        state = torch.tensor(state, dtype=torch.float32).to(self.device)
+        if np.ndim(state) == 2:
+            return self.policy_batch(state)
+        state = self.to_tensor(state)
         if self.training and np.random.random() < self.e:
             return np.random.choice(self.action_space_size, size=1)
         else:
             return torch.argmax(self.model(state), keepdim=True).cpu().numpy()
 
+    def policy_batch(self, states: np.ndarray):
+        """ One forward pass for every row, each row explores on it's own with env_e or e """
+        actions = torch.argmax(self.model(self.to_tensor(states)), dim=1).cpu().numpy()
+        if self.training:
+            e = self.e if self.env_e is None else self.env_e
+            explore = np.random.random(actions.shape[0]) < e
+            actions[explore] = np.random.randint(self.action_space_size, size=np.count_nonzero(explore))
+        return actions
+
     def learn(self, state: np.ndarray, action: int, next_state: np.ndarray, reward: float, done: bool):
         """update: ['hard', 'soft'] = 'soft'"""
+        if np.ndim(done) > 0:
+            return self.learn_batch(state, action, next_state, reward, done)
         self.buffer.push(state, action, next_state, reward, done)
         if self.buffer.trainable:
             self.rewards.append(reward)
@@ -72,6 +98,27 @@ class DeepQNetworkAgent(DeepAgent):
                 self.rewards.clear()
                 print(f"Episode: {self.episode_counter} | Train: {self.train_count} | e: {self.e:.6f} | r: {self.reward_history[-1]:.6f}")
 
+    def learn_batch(self, states: np.ndarray, actions: np.ndarray, next_states: np.ndarray, rewards: np.ndarray, dones: np.ndarray):
+        """ One (N,) step of parallel envs, a single model update for all of them """
+        dones = np.asarray(dones, dtype=bool)
+        self.buffer.extend(states, actions, next_states, rewards, dones)
+        if not self.buffer.trainable:
+            return
+        # Same as learn, rewards and episodes are counted once the buffer is trainable
+        if self.env_rewards is None:
+            self.env_rewards = np.zeros(dones.shape[0])
+        self.env_rewards += rewards
+        self.update_model()
+        self.target_update_fn()
+        for r in self.env_rewards[dones]:
+            self.decay_epsilon()
+            self.episode_counter += 1
+            self.reward_history.append(r)
+            print(f"Episode: {self.episode_counter} | Train: {self.train_count} | e: {self.e:.6f} | r: {r:.6f}")
+        self.env_rewards[dones] = 0
+        if dones.any():
+            self.step_counter = 0
+
     def decay_epsilon(self):
         self.e = max(self.e_min, self.e * self.e_decay)
 
@@ -87,10 +134,10 @@ class DeepQNetworkAgent(DeepAgent):
         self.train_count += 1
         s, a, ns, r, d = self.buffer.sample(self.batch)
         r /= self.reward_norm_factor
-        states = torch.tensor(s).float().to(self.device)
-        next_states = torch.tensor(ns).float().to(self.device)
-        r = torch.tensor(r).float().to(self.device)
-        d = torch.tensor(d).float().to(self.device)
+        states = self.to_tensor(s)
+        next_states = self.to_tensor(ns)
+        r = self.to_tensor(r)
+        d = self.to_tensor(d)
         self.model.eval()
         with torch.no_grad():
             current_qs = self.model(states)
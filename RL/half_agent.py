@@ -0,0 +1,69 @@
+import copy
+import numpy as np
+from .agent import Agent
+
+
+class HalfAgent:
+    """
+    One agent stepping both halves of a double buffered SubprocVecFootball.
+    An agent keeps rollout state between policy and learn (step counters,
+    rollout buffers, per env rewards and exploration rates, see
+    Agent.rollout_fields) that one half would overwrite for the other.
+    Every half gets it's own copy of those attributes and they are swapped
+    into the agent before it's policy or learn runs, the model, optimizers
+    and replay buffer stay shared and the agent's math is unchanged:
+        agent = HalfAgent(agent, env.halves)
+        states = env.reset()
+        states_0, states_1 = states[env.halves[0]], states[env.halves[1]]
+        actions_0 = agent.policy(states_0, 0)
+        env.step_async(actions_0, 0)
+        while ...:
+            actions_1 = agent.policy(states_1, 1)
+            env.step_async(actions_1, 1)
+            next_0, rewards_0, dones_0 = env.step_wait(0)
+            agent.learn(states_0, actions_0, next_0, rewards_0, dones_0, 0)
+            states_0 = next_0
+            actions_0 = agent.policy(states_0, 0)
+            env.step_async(actions_0, 0)
+            next_1, rewards_1, dones_1 = env.step_wait(1)
+            agent.learn(states_1, actions_1, next_1, rewards_1, dones_1, 1)
+            states_1 = next_1
+    """
+
+    def __init__(self, agent: Agent, halves: tuple) -> None:
+        """
+        agent: Agent with it's model (and buffers) created for every env of both halves
+        halves: Row slices of the halves, SubprocVecFootball.halves
+        """
+        self.agent = agent
+        self.env_count = halves[-1].stop
+        self.half = None
+        self.saved = [{name: self.split(name, getattr(agent, name), rows) for name in agent.rollout_fields}
+                      for rows in halves]
+
+    def split(self, name: str, value, rows: slice):
+        """ The part of a rollout attribute that belongs to rows """
+        if name == 'env_count':
+            return rows.stop - rows.start
+        if isinstance(value, np.ndarray) and value.ndim and value.shape[0] == self.env_count:
+            return value[rows].copy()
+        if isinstance(value, list):
+            return []
+        return copy.copy(value)
+
+    def use(self, half: int) -> Agent:
+        """ Swaps the rollout attributes of half into the agent and returns it """
+        if half != self.half:
+            if self.half is not None:
+                self.saved[self.half] = {name: getattr(self.agent, name) for name in self.agent.rollout_fields}
+            for name, value in self.saved[half].items():
+                setattr(self.agent, name, value)
+            self.half = half
+        return self.agent
+
+    def policy(self, states: np.ndarray, half: int):
+        return self.use(half).policy(states)
+
+    def learn(self, states: np.ndarray, actions: np.ndarray, next_states: np.ndarray, rewards: np.ndarray,
+              dones: np.ndarray, half: int):
+        return self.use(half).learn(states, actions, next_states, rewards, dones)
@@ -43,7 +43,7 @@ class OneStepActorCriticAgent(DeepAgent):
 
     def policy(self, state):
         self.step_counter += 1
-        state = torch.tensor(state).float().unsqueeze(0).to(self.device)
+        state = self.to_tensor(state).unsqueeze(0)
         if not self.training:
             self.actor.eval()
             with torch.no_grad():
@@ -74,8 +74,8 @@ class OneStepActorCriticAgent(DeepAgent):
         self.train_count += 1
 
         reward /= self.reward_norm_factor
-        state = torch.tensor(state).float().to(self.device)
-        next_state = torch.tensor(next_state).float().to(self.device)
+        state = self.to_tensor(state)
+        next_state = self.to_tensor(next_state)
 
         # Bug? It doesn't seem to need to compute computational graph when forwarding next_state.
         # But skipping that part with torch.no_grad() breaks learning. Weird!
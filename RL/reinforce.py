@@ -26,7 +26,7 @@ class ReinforceAgent(DeepAgent):
 
     def policy(self, state):
         self.step_counter += 1
-        state = torch.tensor(state, dtype=torch.float32).unsqueeze(0).to(self.device)
+        state = self.to_tensor(state).unsqueeze(0)
         if not self.training:
             self.model.eval()
             with torch.no_grad():
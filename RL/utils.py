@@ -1,3 +1,5 @@
+import os
+import json
 import numpy as np
 
 
@@ -52,6 +54,19 @@ class ReplayBuffer(ReplayBufferBase):
             self.is_full = True
             self.buffer_idx = 0
 
+    def extend(self, states, actions, next_states, rewards, episode_overs):
+        """push of a batch, rows wrap around the end of the buffer"""
+        n = np.shape(rewards)[0]
+        idx = (self.buffer_idx + np.arange(n)) % self.max_size
+        self.state_buffer[idx] = states
+        self.action_buffer[idx] = np.reshape(actions, (n, -1))
+        self.next_state_buffer[idx] = next_states
+        self.reward_buffer[idx] = np.reshape(rewards, (n, 1))
+        self.done_buffer[idx] = np.reshape(episode_overs, (n, 1))
+        if self.buffer_idx + n >= self.max_size:
+            self.is_full = True
+        self.buffer_idx = (self.buffer_idx + n) % self.max_size
+
     def sample(self, sample_size):
         buffer_size_len = self.max_size if self.is_full else self.buffer_idx
         idx = np.random.choice(np.arange(buffer_size_len), sample_size, replace=False)
@@ -63,6 +78,201 @@ class ReplayBuffer(ReplayBufferBase):
         return s, a, ns, r, d
 
 
+class MemmapReplayBuffer(ReplayBufferBase):
+    """
+    ReplayBuffer backed by np.memmap files in a directory, reopening the
+    directory resumes the buffer (after flush) without reading it.
+    Observations are kept once in a ring of frames, transitions hold the
+    frame numbers of their state and next_state. A row of a push (or extend)
+    whose state is the next_state of the same row of the previous one reuses
+    that frame. Frames are overwritten before the transitions using them are,
+    the oldest of those transitions are dropped when it happens.
+    """
+
+    FILES = ('frames', 'state_frame', 'next_frame', 'action', 'reward', 'done')
+    # Default frames past max_size: a push of this many rows plus one new
+    # episode every FRAME_EPISODE_RATE transitions fit without dropping any
+    FRAME_BATCH_HEADROOM = 1024
+    FRAME_EPISODE_RATE = 32
+
+    def __init__(self, max_size, min_size, state_space_shape, path, action_space_shape=1,
+                 state_dtype=np.float32, frame_size=None) -> None:
+        """
+        path: Directory of the buffer files, an existing buffer is reopened
+        state_space_shape: int or tuple shape of a state
+        state_dtype: np.float16 halves the frames, states are sampled as float32
+        frame_size: Frames kept. Continuing rows write one frame per transition, the
+                    default is max_size with room for FRAME_BATCH_HEADROOM rows and a
+                    new episode every FRAME_EPISODE_RATE transitions. When frames run
+                    out anyway the oldest transitions are dropped before max_size of
+                    them are kept and is_full is set. 2 * max_size never drops
+        """
+        super().__init__(max_size, min_size)
+        self.path = path
+        self.state_space_shape = self.normalize_shape(state_space_shape)
+        self.action_space_shape = action_space_shape
+        self.state_dtype = np.dtype(state_dtype)
+        self.frame_size = frame_size or max_size + max_size // self.FRAME_EPISODE_RATE + self.FRAME_BATCH_HEADROOM
+        # Transitions [tail, head) and frames [frame_head - frame_size, frame_head) are kept
+        self.head = 0
+        self.tail = 0
+        self.frame_head = 0
+        self.last_next_frame = None
+        # Rows of the largest push, bounds the transitions checked when frames are dropped
+        self.batch_max = 0
+        meta = os.path.join(path, 'meta.json')
+        mode = 'w+'
+        if os.path.exists(meta):
+            with open(meta) as f:
+                info = json.load(f)
+            settings = self.settings()
+            saved = list(info['settings'])
+            saved[2] = self.normalize_shape(saved[2])
+            if saved != settings:
+                raise ValueError(f"{path} holds a buffer made with {saved}, not {settings}")
+            self.head = info['head']
+            self.tail = info['tail']
+            self.frame_head = info['frame_head']
+            self.last_next_frame = None if info['last_next_frame'] is None else np.array(info['last_next_frame'])
+            self.batch_max = info.get('batch_max', 0)
+            mode = 'r+'
+        else:
+            os.makedirs(path, exist_ok=True)
+        shapes = {'frames': ((self.frame_size, *self.state_space_shape), self.state_dtype),
+                  'state_frame': ((max_size,), np.int64),
+                  'next_frame': ((max_size,), np.int64),
+                  'action': ((max_size, action_space_shape), np.int32),
+                  'reward': ((max_size,), np.float32),
+                  'done': ((max_size,), np.int8)}
+        for name in self.FILES:
+            shape, dtype = shapes[name]
+            setattr(self, name, np.memmap(os.path.join(path, name + '.dat'), dtype=dtype, mode=mode, shape=shape))
+
+    @staticmethod
+    def normalize_shape(shape) -> list:
+        """ 9, (9,), [9] and np.int64(9) are the same shape, [9] """
+        return [int(x) for x in np.atleast_1d(shape)]
+
+    def settings(self) -> list:
+        return [self.max_size, self.frame_size, self.state_space_shape, self.action_space_shape, self.state_dtype.str]
+
+    @property
+    def size(self):
+        return self.head - self.tail
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def is_full(self):
+        """ max_size transitions are kept, or frames ran out and dropped transitions before that """
+        return self.size == self.max_size or self.tail > max(self.head - self.max_size, 0)
+
+    @property
+    def trainable(self):
+        return self.size >= self.min_size or self.is_full
+
+    def write_frames(self, states) -> np.ndarray:
+        """ Returns the frame numbers states were written to """
+        n = states.shape[0]
+        numbers = self.frame_head + np.arange(n)
+        self.frames[numbers % self.frame_size] = states
+        self.frame_head += n
+        return numbers
+
+    def push(self, state, action, next_state, reward, episode_over):
+        """Data format [state, action, next_state, reward, episode_over]"""
+        self.extend([state], [action], [next_state], [reward], [episode_over])
+
+    def extend(self, states, actions, next_states, rewards, episode_overs):
+        """push of a batch, rows wrap around the end of the buffer"""
+        shape = (-1, *self.state_space_shape)
+        states = np.reshape(np.asarray(states, dtype=self.state_dtype), shape)
+        n = states.shape[0]
+        state_frames = None
+        last = self.last_next_frame
+        if last is not None and last.size == n:
+            # Rows that continue the previous push keep their frame, the others get a new one
+            same = np.all(np.reshape(self.frames[last % self.frame_size] == states, (n, -1)), axis=1)
+            if same.any():
+                state_frames = np.copy(last)
+                new = ~same
+                if new.any():
+                    state_frames[new] = self.write_frames(states[new])
+        if state_frames is None:
+            state_frames = self.write_frames(states)
+        next_frames = self.write_frames(np.reshape(np.asarray(next_states, dtype=self.state_dtype), shape))
+        idx = (self.head + np.arange(n)) % self.max_size
+        self.state_frame[idx] = state_frames
+        self.next_frame[idx] = next_frames
+        self.action[idx] = np.reshape(actions, (n, -1))
+        self.reward[idx] = np.reshape(rewards, n)
+        self.done[idx] = np.reshape(episode_overs, n)
+        self.head += n
+        self.last_next_frame = next_frames
+        self.batch_max = max(self.batch_max, n)
+        self.tail = max(self.tail, self.head - self.max_size)
+        oldest_frame = self.frame_head - self.frame_size
+        if oldest_frame > 0:
+            self.tail = self.first_kept(oldest_frame)
+
+    def first_kept(self, oldest_frame) -> int:
+        """ First transition from tail on after which every frame used is not older than oldest_frame """
+        # next_frame grows with the transitions, search it in the (at most two) ring pieces of [tail, head)
+        lo = self.head
+        start = self.tail
+        for a, b in self.ring_pieces():
+            i = int(np.searchsorted(self.next_frame[a:b], oldest_frame))
+            if i < b - a:
+                lo = start + i
+                break
+            start += b - a
+        # State frames come before the next frames of their push, a reused one is a next
+        # frame of the push before. So every state frame older than oldest_frame is
+        # within the next two pushes from lo
+        window = np.arange(lo, min(lo + 2 * self.batch_max, self.head))
+        stale = np.flatnonzero(self.state_frame[window % self.max_size] < oldest_frame)
+        return lo if stale.size == 0 else int(window[stale[-1]]) + 1
+
+    def ring_pieces(self) -> list:
+        """ [tail, head) as (start, end) index ranges of the ring, in order """
+        start = self.tail % self.max_size
+        end = start + self.size
+        if end <= self.max_size:
+            return [(start, end)]
+        return [(start, self.max_size), (0, end - self.max_size)]
+
+    def sample(self, sample_size):
+        """ Indices are drawn with replacement, a permutation of 10M transitions per batch is too slow """
+        idx = np.random.randint(self.tail, self.head, sample_size) % self.max_size
+        s = np.asarray(self.frames[self.state_frame[idx] % self.frame_size], dtype=np.float32)
+        ns = np.asarray(self.frames[self.next_frame[idx] % self.frame_size], dtype=np.float32)
+        a = np.concatenate(np.asarray(self.action[idx]))
+        r = np.asarray(self.reward[idx])
+        d = np.asarray(self.done[idx], dtype=np.int32)
+        return s, a, ns, r, d
+
+    def flush(self):
+        """ Writes the files and the counters, the buffer can be reopened from path after it """
+        for name in self.FILES:
+            getattr(self, name).flush()
+        info = {'settings': self.settings(),
+                'head': self.head,
+                'tail': self.tail,
+                'frame_head': self.frame_head,
+                'last_next_frame': None if self.last_next_frame is None else self.last_next_frame.tolist(),
+                'batch_max': self.batch_max}
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(info, f)
+
+    def clear(self):
+        self.head = 0
+        self.tail = 0
+        self.frame_head = 0
+        self.last_next_frame = None
+        self.batch_max = 0
+
+
 class DoubleReplayBuffer(ReplayBufferBase):
 
     def __init__(self, max_size, min_size) -> None:
@@ -1,11 +1,12 @@
 from Game.graphic import CartesianPlane
-from Game.physics import (Player, Ball, Body, Ray,
+from Game.physics import (Player, Ball, Body,
                           StaticRectangleBody,
                           GoalKeeper)
 from Game.physics import EnginePolygon
-from Game import core
 import numpy as np
 from math import dist
+from collections import deque
+import threading
 
 TEAM_LEFT = 0
 TEAM_RIGHT = 1
@@ -20,6 +21,12 @@ RAY_LENGTH = 100
 RAY_COUNT = 5
 GOAL_AREA_WIDTH = 400
 GOAL_AREA_HEIGHT = 400
+# MT19937 keys, position, has_gauss, cached_gaussian
+RNG_STATE_SIZE = 627
+# Egocentric observation of a player: own speed and has_ball, ball x, y and speed,
+# own goal x, y, opponent goal x, y, then x, y, has_ball of every other player
+OBSERVATION_BASE_SIZE = 9
+OBSERVATION_PLAYER_SIZE = 3
 
 # Actions
 NOOP = 0
@@ -29,37 +36,42 @@ GO_FORWARD = 3
 TURN_LEFT = 4
 TURN_RIGHT = 5
 ACTIONS = [NOOP, STOP, KICK, GO_FORWARD, TURN_LEFT, TURN_RIGHT]
+# Player controls (acceleration, turn, kick power) of every action
+ACTION_CONTROLS = np.array([[0, 0, 0],
+                            [-500, 0, 0],
+                            [0, 0, BALL_SPEED_MAX],
+                            [500, 0, 0],
+                            [0, 1, 0],
+                            [0, -1, 0]], dtype=np.float64)
 
 
 class Sensor:
+    """ Ray readings of one player, the rays are cast by Football.sense """
 
     def __init__(self,
-                 id: int,
-                 plane: CartesianPlane,
                  ray_count: int,
-                 radius: float,
-                 direction: float = 0) -> None:
-        self.rays: list[Ray] = []
-        direction = direction / 180 * np.pi
-        for i in range(ray_count):
-            r = Ray(id, plane.createPlane(), radius)
-            r.shape.color = (230, 230, 230)
-            r.shape.vertices[0].rotate(direction - np.pi / 2 + np.pi / 4 * i)
-            self.rays.append(r)
+                 radius: float) -> None:
+        self.radius = radius
+        # Ray angles relative to the player heading
+        self.angles = -np.pi / 2 + np.pi / 4 * np.arange(ray_count)
+        self.distances = np.ones(ray_count, dtype=np.float32)
 
     def get_state(self):
-        s = []
-        for ray in self.rays:
-            d = dist([ray.x, ray.y], [0, 0])
-            if d == 0:
-                s.append(1)
-            else:
-                s.append(d / ray.radius)
-        return s
+        return self.distances.tolist()
 
     def reset(self):
-        for ray in self.rays:
-            ray.reset()
+        self.distances[:] = 1
+
+    def show(self, player: Player, plane: CartesianPlane):
+        from Game import core
+        x, y = player.position()
+        direction = player.direction() / 180 * np.pi
+        for angle, d in zip(self.angles, self.distances):
+            end = (x + np.cos(direction + angle) * self.radius, y + np.sin(direction + angle) * self.radius)
+            core.draw.aaline(plane.window, (230, 230, 230), plane.to_XY((x, y)), plane.to_XY(end))
+            if d < 1:
+                hit = (x + np.cos(direction + angle) * self.radius * d, y + np.sin(direction + angle) * self.radius * d)
+                core.draw.circle(plane.window, (255, 0, 0), plane.to_XY(hit), 3)
 
 
 class TeamLeft:
@@ -74,23 +86,17 @@ class TeamLeft:
         self.plane = plane
         if goalkeeper:
             p = GoalKeeper(TEAM_LEFT * TEAM_ID_OFFSET, self.TEAM_ID, self.plane)
-            s = Sensor(TEAM_LEFT * TEAM_ID_OFFSET, self.plane, RAY_COUNT, RAY_LENGTH, p.direction())
-            for r in s.rays:
-                p.attach(r, True)
             self.players.append(p)
-            self.sensors.append(s)
+            self.sensors.append(Sensor(RAY_COUNT, RAY_LENGTH))
         for i in range(self.team_size):
             p = Player(TEAM_LEFT * TEAM_ID_OFFSET + i + 1, self.TEAM_ID, self.plane, ability_point=PLAYER_ABILITY_POINT)
-            s = Sensor(TEAM_LEFT * TEAM_ID_OFFSET + i + 1, self.plane, RAY_COUNT, RAY_LENGTH, p.direction())
-            for r in s.rays:
-                p.attach(r, True)
             self.players.append(p)
-            self.sensors.append(s)
+            self.sensors.append(Sensor(RAY_COUNT, RAY_LENGTH))
 
     def reset(self):
-        self.score = 0
         y_lim = (self.plane.window_size[1] - GOAL_AREA_WIDTH) / 2
         saved_pos = []
+        headings = []
         for player in self.players:
             while True:
                 x = np.random.randint(self.plane.x_min + GOAL_AREA_WIDTH, 0 + 1)
@@ -103,8 +109,19 @@ class TeamLeft:
                 if not d:
                     saved_pos.append((x, y))
                     break
-            dr = np.random.random() * np.pi * 2
-            player.reset((x, y), dr)
+            headings.append(np.random.random() * np.pi * 2)
+        self.place(saved_pos, headings)
+
+    def place(self, positions, headings):
+        """ Puts the players at positions with headings (radians) and clears the score """
+        self.score = 0
+        for player, pos, dr in zip(self.players, positions, headings):
+            player.reset(pos, dr)
+
+    def spawn_area(self) -> tuple:
+        """ Inclusive (x_min, x_max, y_min, y_max) integer area reset places the players in """
+        y_lim = int((self.plane.window_size[1] - GOAL_AREA_WIDTH) / 2)
+        return int(self.plane.x_min + GOAL_AREA_WIDTH), 0, -y_lim, y_lim
 
 
 class TeamRight:
@@ -119,23 +136,17 @@ class TeamRight:
         self.plane = plane
         if goalkeeper:
             p = GoalKeeper(TEAM_RIGHT * TEAM_ID_OFFSET, self.TEAM_ID, self.plane)
-            s = Sensor(TEAM_RIGHT * TEAM_ID_OFFSET, self.plane, RAY_COUNT, RAY_LENGTH, p.direction())
-            for r in s.rays:
-                p.attach(r, True)
             self.players.append(p)
-            self.sensors.append(s)
+            self.sensors.append(Sensor(RAY_COUNT, RAY_LENGTH))
         for i in range(self.team_size):
             p = Player(TEAM_RIGHT * TEAM_ID_OFFSET + i + 1, self.TEAM_ID, self.plane, ability_point=PLAYER_ABILITY_POINT)
-            s = Sensor(TEAM_RIGHT * TEAM_ID_OFFSET + i + 1, self.plane, RAY_COUNT, RAY_LENGTH, p.direction())
-            for r in s.rays:
-                p.attach(r, True)
             self.players.append(p)
-            self.sensors.append(s)
+            self.sensors.append(Sensor(RAY_COUNT, RAY_LENGTH))
 
     def reset(self):
-        self.score = 0
         y_lim = (self.plane.window_size[1] - GOAL_AREA_WIDTH) / 2
         saved_pos = []
+        headings = []
         for player in self.players:
             while True:
                 x = np.random.randint(0, self.plane.x_max - GOAL_AREA_WIDTH + 1)
@@ -148,19 +159,32 @@ class TeamRight:
                 if not d:
                     saved_pos.append((x, y))
                     break
-            dr = np.random.random() * np.pi * 2
-            player.reset((x, y), dr)
+            headings.append(np.random.random() * np.pi * 2)
+        self.place(saved_pos, headings)
+
+    def place(self, positions, headings):
+        """ Puts the players at positions with headings (radians) and clears the score """
+        self.score = 0
+        for player, pos, dr in zip(self.players, positions, headings):
+            player.reset(pos, dr)
             player.has_ball = False
             player.kicked = False
 
+    def spawn_area(self) -> tuple:
+        """ Inclusive (x_min, x_max, y_min, y_max) integer area reset places the players in """
+        y_lim = int((self.plane.window_size[1] - GOAL_AREA_WIDTH) / 2)
+        return 0, int(self.plane.x_max - GOAL_AREA_WIDTH), -y_lim, y_lim
+
 
 class Football:
 
-    def __init__(self, window, size, fps, team_size, full: bool = True) -> None:
+    def __init__(self, window, size, fps, team_size, full: bool = True, array_step: bool = False, rays: bool = True, sleep: bool = True) -> None:
         self.window = window
         self.size = size
         self.fps = fps
         self.team_size = team_size
+        self.full = full
+        self.rays = rays
 
         self.players: list[Player] = []
         self.sensors: list[Sensor] = []
@@ -177,79 +201,185 @@ class Football:
         self.players.extend(self.teamRight.players)
         self.bodies.extend(self.teamRight.players)
         self.sensors.extend(self.teamRight.sensors)
-        for sensor in self.teamRight.sensors:
-            self.bodies.extend(sensor.rays)
         if full:
             self.players.extend(self.teamLeft.players)
             self.bodies.extend(self.teamLeft.players)
             self.sensors.extend(self.teamLeft.sensors)
-            for sensor in self.teamLeft.sensors:
-                self.bodies.extend(sensor.rays)
 
-        self.engine = EnginePolygon(self.plane, np.array(self.bodies, dtype=Body))
+        self.engine = EnginePolygon(self.plane, np.array(self.bodies, dtype=Body), array_step=array_step, sleep=sleep)
+        self.player_array = np.array(self.players, dtype=Body)
+        self.ray_angles = self.sensors[0].angles.copy()
+        self.ray_distances = None
+        self.bind_sensors(np.ones((self.players.__len__(), RAY_COUNT), dtype=np.float32))
 
         self.ball = Ball(0, self.plane, (BALL_SIZE,) * 10, drag_coef=0.005)
 
+        # Observation tables, teammates then opponents of every player in players order
+        team = np.array([player.team_id for player in self.players])
+        index = np.arange(team.size)
+        self.teammates = np.array([index[(team == team[i]) & (index != i)] for i in index], dtype=np.int64).reshape(team.size, -1)
+        self.opponents = np.array([index[team != team[i]] for i in index], dtype=np.int64).reshape(team.size, -1)
+        self.others = np.concatenate([self.teammates, self.opponents], axis=1)
+        right_goal = [self.plane.x_max - GOAL_AREA_WIDTH, 0]
+        left_goal = [self.plane.x_min + GOAL_AREA_WIDTH, 0]
+        self.attack_goal = np.where((team == TEAM_RIGHT)[:, None], right_goal, left_goal)
+        self.defend_goal = np.where((team == TEAM_RIGHT)[:, None], left_goal, right_goal)
+        self.player_state = np.zeros((team.size, 5))
+        self.observation_size = OBSERVATION_BASE_SIZE + OBSERVATION_PLAYER_SIZE * self.others.shape[1]
+
     def step(self, actions: list = None):
-        if actions:
-            for i, action in enumerate(actions):
-                speed = self.players[i].speed()
-                speed /= 300
-                if action == GO_FORWARD:
-                    self.players[i].accelerate(500)
-                elif action == STOP:
-                    self.players[i].accelerate(-500)
-                elif action == TURN_LEFT:
-                    self.players[i].rotate(self.players[i].PLAYER_MAX_TURN_RATE / (speed + 1))
-                elif action == TURN_RIGHT:
-                    self.players[i].rotate(-self.players[i].PLAYER_MAX_TURN_RATE / (speed + 1))
-                elif action == KICK:
-                    self.players[i].kick(self.ball, BALL_SPEED_MAX)
-                elif actions == NOOP:
-                    pass
+        self.tick(actions)
+        if self.rays:
+            self.sense()
+
+    def tick(self, actions: list = None):
+        """ One physics tick without sensing """
+        if actions is not None:
+            # Agents return (1,) arrays for a single state, any int-like action is a row
+            controls = ACTION_CONTROLS[np.asarray(actions, dtype=np.int64).reshape(-1)]
+            for i in range(controls.shape[0]):
+                acceleration, turn, kick_power = controls[i]
+                self.players[i].control(acceleration, turn, kick_power, self.ball)
+        self.engine.step()
+        self.ball.step()
+        self.check_ball()
+
+    def settle(self):
+        """ The tick after a reset that takes the ball and pushes overlapping bodies apart """
         self.engine.step()
         self.ball.step()
         self.check_ball()
+        if self.rays:
+            self.sense()
+
+    def sense(self):
+        """ Casts the rays of every player, results are in ray_distances """
+        self.engine.cast_rays(self.player_array, self.ray_angles, RAY_LENGTH, self.ray_distances)
+
+    def observe(self, out: np.ndarray = None) -> np.ndarray:
+        """
+        Every player's view of the field from it's own position and heading,
+        distances are divided by plane.x_max and speeds by their maximum.
+        out: (players, observation_size) float32 buffer, a new one if None
+        """
+        if out is None:
+            out = np.zeros((self.players.__len__(), self.observation_size), dtype=np.float32)
+        p = self.player_state
+        self.engine.observe(self.player_array, p)
+        heading = np.radians(p[:, 2:3])
+        cos = np.cos(heading)
+        sin = np.sin(heading)
+        pos = p[:, None, :2]
+        # Everything else relative to the player, in a frame turned with it
+        xy = np.empty((p.shape[0], 3 + self.others.shape[1], 2))
+        xy[:, 0] = self.ball.position()
+        xy[:, 1] = self.defend_goal
+        xy[:, 2] = self.attack_goal
+        xy[:, 3:] = p[self.others, :2]
+        xy -= pos
+        xy /= self.plane.x_max
+        dx = xy[:, :, 0]
+        dy = xy[:, :, 1]
+        out[:, 0] = p[:, 3] / self.players[0].PLAYER_MAX_SPEED
+        out[:, 1] = p[:, 4]
+        out[:, 2] = dx[:, 0] * cos[:, 0] + dy[:, 0] * sin[:, 0]
+        out[:, 3] = dy[:, 0] * cos[:, 0] - dx[:, 0] * sin[:, 0]
+        out[:, 4] = self.ball.speed() / BALL_SPEED_MAX
+        out[:, 5:9:2] = dx[:, 1:3] * cos + dy[:, 1:3] * sin
+        out[:, 6:9:2] = dy[:, 1:3] * cos - dx[:, 1:3] * sin
+        others = out[:, OBSERVATION_BASE_SIZE:].reshape(p.shape[0], -1, OBSERVATION_PLAYER_SIZE)
+        others[:, :, 0] = dx[:, 3:] * cos + dy[:, 3:] * sin
+        others[:, :, 1] = dy[:, 3:] * cos - dx[:, 3:] * sin
+        others[:, :, 2] = p[self.others, 4]
+        return out
+
+    def bind_sensors(self, distances: np.ndarray):
+        """
+        distances: (players, RAY_COUNT) float32 array the rays are cast into,
+        every sensor reads it's own row
+        """
+        self.ray_distances = distances
+        for i, sensor in enumerate(self.sensors):
+            sensor.distances = distances[i]
 
     def reset(self):
         self.ball.reset((0, 0))
         self.teamLeft.reset()
         self.teamRight.reset()
 
+    def get_counters(self) -> list:
+        return [self.teamLeft.score, self.teamRight.score, self.current_player]
+
+    def set_counters(self, counters) -> None:
+        self.teamLeft.score = int(counters[0])
+        self.teamRight.score = int(counters[1])
+        self.current_player = int(counters[2])
+
+    def snapshot(self, rng: bool = True) -> np.ndarray:
+        """
+        Body kinematics, possession, scores, counters, ray readings and
+        (if rng) the numpy RNG state of the world in one float64 array
+        """
+        counters = self.get_counters()
+        ball_owner = -1
+        ball_head = self.ball.shape.plane.get_parent_vector().get_head_ref()
+        for i, player in enumerate(self.players):
+            if player.shape.plane.get_parent_vector().get_head_ref() is ball_head:
+                ball_owner = i
+                break
+        state = np.zeros(2 + counters.__len__() + self.engine.state_size() + self.ball.state_size()
+                         + self.ray_distances.size + (RNG_STATE_SIZE if rng else 0))
+        state[0] = rng
+        state[1] = ball_owner
+        offset = 2 + counters.__len__()
+        state[2:offset] = counters
+        offset = self.engine.save_state(state, offset)
+        offset = self.ball.save_state(state, offset)
+        state[offset:offset + self.ray_distances.size] = self.ray_distances.ravel()
+        offset += self.ray_distances.size
+        if rng:
+            _, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+            state[offset:offset + 624] = keys
+            state[offset + 624:] = (pos, has_gauss, cached_gaussian)
+        return state
+
+    def restore(self, state: np.ndarray) -> None:
+        """ Puts the world back to a snapshot of a world made with the same settings """
+        state = np.ascontiguousarray(state, dtype=np.float64)
+        counters = self.get_counters()
+        offset = 2 + counters.__len__()
+        self.set_counters(state[2:offset])
+        offset = self.engine.load_state(state, offset)
+        ball_owner = int(state[1])
+        if ball_owner < 0:
+            # Fresh heads, same as a kick
+            self.ball.reset((0, 0))
+        else:
+            # Same heads as the owner, same as check_ball
+            player = self.players[ball_owner]
+            self.ball.velocity.set_head_ref(player.velocity.get_head_ref())
+            self.ball.shape.plane.get_parent_vector().set_head_ref(player.shape.plane.get_parent_vector().get_head_ref())
+        offset = self.ball.load_state(state, offset)
+        self.ray_distances[:] = state[offset:offset + self.ray_distances.size].reshape(self.ray_distances.shape)
+        offset += self.ray_distances.size
+        if state[0]:
+            np.random.set_state(('MT19937', state[offset:offset + 624].astype(np.uint32),
+                                 int(state[offset + 624]), int(state[offset + 625]), float(state[offset + 626])))
+
+    def to_bytes(self, rng: bool = True) -> bytes:
+        return self.snapshot(rng).tobytes()
+
+    def from_bytes(self, data: bytes) -> None:
+        self.restore(np.frombuffer(data, dtype=np.float64))
+
     def check_ball(self):
         if not self.ball.is_out:
-            tmp = self.ball.is_free
-            if self.ball.is_free:
-                dists = []
-                idx = []
-                for i, player in enumerate(self.players):
-                    d = player.shape.plane.get_parent_vector().dist(self.ball.shape.plane.get_parent_vector())
-                    if (d <= (player.radius + self.ball.radius)):
-                        dists.append(d)
-                        idx.append(i)
-                    else:
-                        player.kicked = False
-                if idx.__len__() > 0:
-                    p_idx = idx[np.argmin(dists)]
-                    player = self.players[p_idx]
-                    if player.kicked:
-                        pass
-                    else:
-                        self.ball.is_free = False
-                        self.ball.velocity.set_head_ref(player.velocity.get_head_ref())
-                        self.ball.shape.plane.get_parent_vector().set_head_ref(player.shape.plane.get_parent_vector().get_head_ref())
-                        player.has_ball = True
-                        player.velocity.max = player.PLAYER_SPEED_BALL
-                        self.current_player = p_idx
-            if self.ball.is_free:
+            owner = self.engine.possess(self.player_array, self.ball, self.current_player)
+            if owner == -1:
                 pos = self.ball.position()
             else:
-                if not tmp:
-                    for i, p in enumerate(self.players):
-                        if p.has_ball:
-                            self.current_player = i
-                            break
-                pos = self.players[self.current_player].position()
+                self.current_player = owner
+                pos = self.players[owner].position()
             if (pos[0] < self.plane.x_min + GOAL_AREA_WIDTH) and (-GOAL_AREA_HEIGHT / 2 < pos[1] < GOAL_AREA_HEIGHT / 2):
                 self.teamLeft.score += 1
                 self.players[self.current_player].has_ball = False
@@ -287,6 +417,8 @@ class Football:
             x += wall_width
 
     def show(self):
+        # pygame is only needed to draw, headless worlds never import it
+        from Game import core
         width = self.size[0] - GOAL_AREA_WIDTH * 2
         height = self.size[1] - GOAL_AREA_WIDTH
         core.draw.rect(self.window, (0, 0, 0), (GOAL_AREA_WIDTH, GOAL_AREA_WIDTH / 2, width, height), 1)  # Touch line
@@ -313,6 +445,9 @@ class Football:
                 body.show(TEAM_COLOR[body.team_id])
             else:
                 body.show()
+        if self.rays:
+            for player, sensor in zip(self.players, self.sensors):
+                sensor.show(player, self.plane)
         if self.ball.is_free:
             self.ball.show()
         # p1 = self.players[self.current_player]
@@ -334,3 +469,125 @@ class Football:
         #             ab = np.arccos(p1.velocity.dot(v) / dot) / np.pi * 180
         #             if ab < player.PLAYER_MAX_FOV / 2:
         #                 v.show()
+
+
+class ResetPool:
+    """
+    Start states of a world made ahead in batches, a reset is then a restore.
+    The players of a whole batch are placed at once, a configuration is
+    drawn again while two teammates are closer than the team resets allow,
+    then every configuration is settled in a scratch world and snapshot.
+    Snapshots don't depend on the world they were made in, one pool can
+    serve every world made with the same settings.
+    """
+
+    def __init__(self, world: Football, size: int = 4096, ball: tuple = (300, 0), background: bool = False,
+                 seed: int = None) -> None:
+        """
+        world: Headless scratch world owned by the pool, same settings as the worlds reset from it
+        size: Configurations made per batch
+        ball: Fixed ball position, or None for a uniform position in the right team's area
+        background: Refill on a daemon thread once less than half a batch is left,
+                    settling then draws from np.random at unpredictable times
+        seed: Seed of the pool's own generator for positions and headings
+        """
+        self.world = world
+        self.size = size
+        self.ball = ball
+        self.rng = np.random.default_rng(seed)
+        # Same order as world.players
+        self.teams = [world.teamRight, world.teamLeft] if world.full else [world.teamRight]
+        self.states = deque()
+        # Held per configuration, signalled every time one is queued
+        self.lock = threading.Lock()
+        self.queued = threading.Condition(self.lock)
+        self.wanted = threading.Event()
+        self.closed = False
+        self.thread = None
+        if background:
+            self.thread = threading.Thread(target=self.refill, daemon=True)
+            self.thread.start()
+            self.wanted.set()
+
+    def sample(self, count: int):
+        """ Returns (count, players, 2) positions, (count, players) headings and (count, 2) ball positions """
+        columns = []
+        for team in self.teams:
+            x_min, x_max, y_min, y_max = team.spawn_area()
+            n = team.players.__len__()
+            gap = team.players[0].PLAYER_SIZE * 2
+            pos = np.empty((count, n, 2), dtype=np.int64)
+            todo = np.arange(count)
+            while todo.size:
+                pos[todo, :, 0] = self.rng.integers(x_min, x_max + 1, (todo.size, n))
+                pos[todo, :, 1] = self.rng.integers(y_min, y_max + 1, (todo.size, n))
+                d = pos[todo, :, None] - pos[todo, None, :]
+                close = np.hypot(d[..., 0], d[..., 1]) < gap
+                close[:, np.arange(n), np.arange(n)] = False
+                todo = todo[close.any(axis=(1, 2))]
+            columns.append(pos)
+        positions = np.concatenate(columns, axis=1)
+        headings = self.rng.random(positions.shape[:2]) * np.pi * 2
+        if self.ball is None:
+            x_min, x_max, y_min, y_max = self.world.teamRight.spawn_area()
+            balls = np.stack([self.rng.integers(x_min, x_max + 1, count),
+                              self.rng.integers(y_min, y_max + 1, count)], axis=1)
+        else:
+            balls = np.tile(self.ball, (count, 1))
+        return positions, headings, balls
+
+    def fill(self):
+        """ Makes and queues one batch, every configuration is available as soon as it's settled """
+        world = self.world
+        with self.lock:
+            positions, headings, balls = self.sample(self.size)
+        positions = positions.tolist()
+        headings = headings.tolist()
+        balls = balls.tolist()
+        for i in range(self.size):
+            if self.closed and threading.current_thread() is self.thread:
+                return
+            with self.queued:
+                world.ball.reset(tuple(balls[i]))
+                start = 0
+                for team in self.teams:
+                    end = start + team.players.__len__()
+                    team.place([tuple(p) for p in positions[i][start:end]], headings[i][start:end])
+                    start = end
+                world.settle()
+                self.states.append(world.snapshot(rng=False))
+                self.queued.notify()
+
+    def refill(self):
+        while True:
+            self.wanted.wait()
+            self.wanted.clear()
+            if self.closed:
+                return
+            self.fill()
+
+    def get(self) -> np.ndarray:
+        """
+        Next start state for Football.restore. A dry pool waits for the refill
+        thread's next configuration, without one a batch is made on the spot
+        """
+        if self.thread is not None:
+            with self.queued:
+                if self.states.__len__() < self.size // 2:
+                    self.wanted.set()
+                while not self.states and not self.closed:
+                    self.queued.wait()
+                if self.states:
+                    return self.states.popleft()
+        try:
+            return self.states.popleft()
+        except IndexError:
+            self.fill()
+            return self.states.popleft()
+
+    def close(self):
+        """ Stops the refill thread, waiting gets fall back to filling on their own thread """
+        self.closed = True
+        self.wanted.set()
+        with self.queued:
+            self.queued.notify_all()
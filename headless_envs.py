@@ -0,0 +1,515 @@
+# Single player RLFootball worlds, their batches and the worker processes
+# stepping them. Nothing here imports pygame, the windowed games built on
+# them are in single_agent_envs
+from Game.graphic import CartesianPlane
+from Game.physics import StaticRectangleBody, EngineBatch, EnginePolygon, Player, Ball
+from football import Football, ResetPool, BALL_SPEED_MAX, GOAL_AREA_WIDTH, RAY_COUNT, RAY_LENGTH, ACTION_CONTROLS
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import traceback
+
+
+ACTION_SPACE_SIZE = 6
+STATE_SPACE_SIZE = 9
+RAY_STATE_SPACE_SIZE = STATE_SPACE_SIZE + RAY_COUNT
+# States are float32 end to end, agents wrap them with torch.from_numpy
+STATE_DTYPE = np.float32
+
+
+class RLFootball(Football):
+
+    def __init__(self, window, size, fps, team_size, full: bool = True, array_step: bool = False, rays: bool = False,
+                 frame_skip: int = 1) -> None:
+        """
+        frame_skip: Physics ticks every step() call repeats the actions for,
+                    rewards are summed and it stops early at the end of the episode
+        """
+        super().__init__(window, size, fps, team_size, full, array_step, rays)
+        if frame_skip < 1:
+            raise ValueError("frame_skip must be at least 1")
+        self.state_size = RAY_STATE_SPACE_SIZE if rays else STATE_SPACE_SIZE
+        self.frame_skip = frame_skip
+        self.counter = 0
+        self.done = False
+        self.reset_pool: ResetPool = None
+
+    def step(self, actions: list = None, out: np.ndarray = None):
+        """ out: Buffer the next state is written into, see get_state """
+        reward = 0
+        for _ in range(self.frame_skip):
+            reward += self.tick(actions)
+            if self.done:
+                break
+        if self.rays:
+            self.sense()
+        return self.get_state(out), reward, self.done
+
+    def tick(self, actions: list = None):
+        """ One physics tick, returns it's reward """
+        super().tick(actions)
+        self.counter += 1
+        if self.counter == (self.fps * 10):
+            self.done = True
+        ball_pos = self.ball.position()
+        if self.ball.is_out or ball_pos[0] < 0 or ball_pos[0] > self.size[0] // 2 - GOAL_AREA_WIDTH \
+                or ball_pos[1] < -self.size[1] // 2 + GOAL_AREA_WIDTH // 2 or ball_pos[1] > self.size[1] // 2 - GOAL_AREA_WIDTH // 2:
+            self.done = True
+        if self.teamRight.score:
+            self.done = True
+            reward = self.fps * 10
+        elif self.done and not self.teamRight.score:
+            reward = -1
+        else:
+            reward = -1
+        return reward
+
+    def get_counters(self) -> list:
+        return super().get_counters() + [self.counter, self.done]
+
+    def set_counters(self, counters) -> None:
+        super().set_counters(counters)
+        self.counter = int(counters[3])
+        self.done = bool(counters[4])
+
+    def get_state(self, out: np.ndarray = None):
+        """ Writes the state into out (a new float32 array if None) and returns it """
+        if out is None:
+            out = np.zeros(self.state_size, dtype=STATE_DTYPE)
+        state = out
+        if self.rays:
+            out[:RAY_COUNT] = self.sensors[0].distances
+            state = out[RAY_COUNT:]
+        ball_pos = self.ball.position()
+        player_pos = self.players[0].position()
+        state[0] = ball_pos[0] / self.plane.x_max
+        state[1] = ball_pos[1] / self.plane.y_max
+        state[2] = self.ball.direction() / 360
+        state[3] = self.ball.speed() / BALL_SPEED_MAX
+        state[4] = player_pos[0] / self.plane.x_max
+        state[5] = player_pos[1] / self.plane.y_max
+        state[6] = self.players[0].direction() / 360
+        state[7] = self.players[0].speed() / self.players[0].PLAYER_MAX_SPEED
+        state[8] = self.players[0].has_ball
+        return out
+
+    def reset(self, random_ball=False, out: np.ndarray = None):
+        """ With a reset_pool the start state is restored from it and random_ball is up to the pool """
+        if self.reset_pool is not None:
+            self.restore(self.reset_pool.get())
+            return self.get_state(out)
+        self.counter = 0
+        self.done = False
+        x = 300
+        y = 0
+        if random_ball:
+            # y_lim = (self.plane.window_size[1] - GOAL_AREA_WIDTH) / 2
+            # x = np.random.randint(0, self.plane.x_max - GOAL_AREA_WIDTH + 1)
+            # y = np.random.randint(-y_lim, y_lim + 1)
+            x = 100
+            y = 200
+        self.ball.reset((x, y))
+        self.teamRight.reset()
+        self.settle()
+        return self.get_state(out)
+
+    def create_wall(self, wall_width=120, wall_height=5):
+        y = self.size[1] // 2 - wall_width // 2 - wall_height // 2
+        pad = 40
+        for _ in range(self.size[1] // wall_width):
+            self.bodies.append(
+                StaticRectangleBody(-1,
+                                    CartesianPlane(self.window, (wall_width, wall_width),
+                                                   self.plane.createVector(-pad // 2, y)),
+                                    (wall_height, wall_width)))
+            self.bodies.append(
+                StaticRectangleBody(-1,
+                                    CartesianPlane(self.window, (wall_width, wall_width),
+                                                   self.plane.createVector(self.size[0] // 2 - GOAL_AREA_WIDTH + pad, y)),
+                                    (wall_height, wall_width)))
+            y -= wall_width
+
+        x = 0
+        for _ in range(self.size[0] // wall_width):
+            vec = self.plane.createVector(x, self.size[1] // 2 - GOAL_AREA_WIDTH // 2 + pad)
+            self.bodies.append(
+                StaticRectangleBody(-1,
+                                    CartesianPlane(self.window, (wall_width, wall_width), vec),
+                                    (wall_width, wall_height)))
+            vec = self.plane.createVector(x, -self.size[1] // 2 + GOAL_AREA_WIDTH // 2 - pad)
+            self.bodies.append(
+                StaticRectangleBody(-1,
+                                    CartesianPlane(self.window, (wall_width, wall_width), vec),
+                                    (wall_width, wall_height)))
+            x += wall_width
+
+
+class RLFootballBatch:
+    """ Steps RLFootball worlds with identical layouts in one engine call """
+
+    def __init__(self, envs: list, random_ball: bool = False) -> None:
+        self.envs: list[RLFootball] = envs
+        self.env_count = envs.__len__()
+        self.random_ball = random_ball
+        self.fps = envs[0].fps
+        self.size = envs[0].size
+        self.x_max = envs[0].plane.x_max
+        self.y_max = envs[0].plane.y_max
+        self.player_count = envs[0].players.__len__()
+        self.player_max_speed = envs[0].players[0].PLAYER_MAX_SPEED
+        self.rays = envs[0].rays
+        self.frame_skip = envs[0].frame_skip
+        players = np.array([env.players for env in envs], dtype=Player).reshape(self.env_count, self.player_count)
+        self.engine = EngineBatch(np.array([env.engine for env in envs], dtype=EnginePolygon),
+                                  players,
+                                  np.array([env.ball for env in envs], dtype=Ball))
+        self.controls = np.zeros((self.env_count, self.player_count, 3))
+        self.ball_state = np.zeros((self.env_count, 5))
+        self.player_state = np.zeros((self.env_count, self.player_count, 5))
+        self.scores = np.zeros(self.env_count)
+        self.counter = np.zeros(self.env_count, dtype=np.int64)
+        self.done = np.zeros(self.env_count, dtype=bool)
+        self.active = np.ones(self.env_count, dtype=np.int32)
+        self.tick_rewards = np.zeros(self.env_count)
+        self.ray_distances = np.ones((self.env_count, self.player_count, RAY_COUNT), dtype=np.float32)
+        self.ray_angles = envs[0].ray_angles
+        for i in range(self.env_count):
+            self.envs[i].bind_sensors(self.ray_distances[i])
+
+    def reset(self, states: np.ndarray):
+        for i in range(self.env_count):
+            self.envs[i].reset(random_ball=self.random_ball, out=states[i])
+        self.counter[:] = 0
+        self.done[:] = False
+
+    def reset_done(self, states: np.ndarray):
+        """ Resets only the worlds that are done, writes their first states """
+        for i in np.flatnonzero(self.done):
+            self.envs[i].reset(random_ball=self.random_ball, out=states[i])
+            self.counter[i] = 0
+            self.done[i] = False
+
+    def step(self, actions: np.ndarray, states: np.ndarray, rewards: np.ndarray, dones: np.ndarray):
+        """
+        actions: (N,) or (N, players) Action of every controlled player
+        Writes (N, state size) states, (N,) rewards and (N,) dones
+        """
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.env_count, -1)
+        self.controls[:, :actions.shape[1]] = ACTION_CONTROLS[actions]
+        self.active[:] = 1
+        rewards[:] = 0
+        for _ in range(self.frame_skip):
+            self.tick()
+            rewards[:] += np.where(self.active, self.tick_rewards, 0)
+            # Worlds that ended stop for the rest of this step
+            self.active[self.done] = 0
+            if not self.active.any():
+                break
+        if self.rays:
+            self.engine.cast_rays(self.ray_angles, RAY_LENGTH, self.ray_distances)
+        dones[:] = self.done
+        self.get_states(states)
+
+    def tick(self):
+        """ One physics tick of every active world, rewards are in tick_rewards """
+        self.engine.step(self.controls, self.active)
+        for i in range(self.env_count):
+            if self.active[i]:
+                self.envs[i].check_ball()
+                self.scores[i] = self.envs[i].teamRight.score
+        self.engine.observe(self.ball_state, self.player_state)
+
+        self.counter += self.active
+        self.done |= self.counter == (self.fps * 10)
+        ball_x = self.ball_state[:, 0]
+        ball_y = self.ball_state[:, 1]
+        self.done |= (self.ball_state[:, 4] != 0) | (ball_x < 0) | (ball_x > self.size[0] // 2 - GOAL_AREA_WIDTH) \
+            | (ball_y < -self.size[1] // 2 + GOAL_AREA_WIDTH // 2) | (ball_y > self.size[1] // 2 - GOAL_AREA_WIDTH // 2)
+        self.done |= self.scores != 0
+        self.tick_rewards[:] = np.where(self.scores != 0, self.fps * 10, -1)
+
+    def get_states(self, states: np.ndarray):
+        """ Vectorized RLFootball.get_state of every world """
+        if self.rays:
+            states[:, :RAY_COUNT] = self.ray_distances[:, 0]
+            states = states[:, RAY_COUNT:]
+        states[:, 0] = self.ball_state[:, 0] / self.x_max
+        states[:, 1] = self.ball_state[:, 1] / self.y_max
+        states[:, 2] = self.ball_state[:, 2] / 360
+        states[:, 3] = self.ball_state[:, 3] / BALL_SPEED_MAX
+        states[:, 4] = self.player_state[:, 0, 0] / self.x_max
+        states[:, 5] = self.player_state[:, 0, 1] / self.y_max
+        states[:, 6] = self.player_state[:, 0, 2] / 360
+        states[:, 7] = self.player_state[:, 0, 3] / self.player_max_speed
+        states[:, 8] = self.player_state[:, 0, 4]
+
+
+class VecFootball:
+    """
+    Headless RLFootball worlds stepped as one batch. Worlds that finish are
+    reset on the spot, step() returns the first state of their next episode
+    and their last state is kept in terminal_states (overwritten by the next step).
+    reset() and step() return new arrays unless out is given, then they write
+    into it without copying.
+    """
+
+    def __init__(self, env_count: int = 1, random_ball: bool = False, rays: bool = False, frame_skip: int = 1,
+                 array_step: bool = False, size: tuple = (1920, 1080), fps: int = 30,
+                 reset_pool: ResetPool = None) -> None:
+        """
+        reset_pool: Pool every world is reset from, made with a headless RLFootball
+                    of the same size, fps and rays, see make_reset_pool
+        """
+        self.env_count = env_count
+        self.state_size = RAY_STATE_SPACE_SIZE if rays else STATE_SPACE_SIZE
+        self.envs = [RLFootball(None, size, fps, 1, False, array_step, rays=rays, frame_skip=frame_skip)
+                     for _ in range(env_count)]
+        for env in self.envs:
+            env.reset_pool = reset_pool
+        self.batch = RLFootballBatch(self.envs, random_ball)
+        self.states = np.zeros((env_count, self.state_size), dtype=STATE_DTYPE)
+        self.terminal_states = np.zeros((env_count, self.state_size), dtype=STATE_DTYPE)
+        self.rewards = np.zeros(env_count)
+        self.dones = np.zeros(env_count, dtype=bool)
+
+    def reset(self, out: np.ndarray = None) -> np.ndarray:
+        """ out: (N, state size) float32 array the first states are written into and returned """
+        states = self.states if out is None else out
+        self.batch.reset(states)
+        self.dones[:] = False
+        return self.states.copy() if out is None else out
+
+    def step(self, actions: np.ndarray, out: tuple = None):
+        """
+        actions: (N,) Action of every world
+        out: (states, rewards, dones) arrays shaped and typed like the returned ones,
+             written into and returned instead of new arrays
+        Returns (N, state size) states, (N,) rewards and (N,) dones
+        """
+        states, rewards, dones = (self.states, self.rewards, self.dones) if out is None else out
+        self.batch.step(actions, states, rewards, dones)
+        if self.batch.done.any():
+            np.copyto(self.terminal_states, states, where=dones[:, None])
+            self.batch.reset_done(states)
+        if out is None:
+            return states.copy(), rewards.copy(), dones.copy()
+        return out
+
+
+def make_reset_pool(random_ball: bool = False, rays: bool = False, size: tuple = (1920, 1080), fps: int = 30,
+                    pool_size: int = 4096, background: bool = False, seed: int = None) -> ResetPool:
+    """
+    Pool for the single player RLFootball worlds, random_ball draws the ball
+    uniformly in the player's area instead of the fixed start position
+    """
+    world = RLFootball(None, size, fps, 1, False, rays=rays)
+    return ResetPool(world, pool_size, None if random_ball else (300, 0), background, seed)
+
+
+# Layout of the block SubprocVecFootball shares with it's workers
+SHARED_FIELDS = (('actions', np.int64, False),
+                 ('states', STATE_DTYPE, True),
+                 ('terminal_states', STATE_DTYPE, True),
+                 ('rewards', np.float64, False),
+                 ('dones', np.bool_, False))
+
+
+def shared_arrays(buffer, env_count: int, state_size: int) -> dict:
+    """ Views of SHARED_FIELDS over buffer, None only counts the bytes (under 'nbytes') """
+    arrays = {}
+    offset = 0
+    for name, dtype, per_state in SHARED_FIELDS:
+        shape = (env_count, state_size) if per_state else (env_count,)
+        if buffer is not None:
+            arrays[name] = np.ndarray(shape, dtype, buffer=buffer, offset=offset)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    arrays['nbytes'] = offset
+    return arrays
+
+
+def vec_worker(pipe, shm_name: str, env_count: int, start: int, end: int, state_size: int, kwargs: dict, seed):
+    """ Steps rows [start, end) of a SubprocVecFootball as one VecFootball """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = shared_arrays(shm.buf, env_count, state_size)
+    env = out = None
+    try:
+        if seed is not None:
+            np.random.seed(seed)
+        env = VecFootball(end - start, **kwargs)
+        # Write straight into the shared rows
+        out = (arrays['states'][start:end], arrays['rewards'][start:end], arrays['dones'][start:end])
+        env.terminal_states = arrays['terminal_states'][start:end]
+        pipe.send(None)
+        while True:
+            cmd = pipe.recv()
+            if cmd == 'step':
+                env.step(arrays['actions'][start:end], out)
+            elif cmd == 'reset':
+                env.reset(out[0])
+                out[2][:] = False
+            elif cmd == 'close':
+                break
+            pipe.send(None)
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        pipe.send(traceback.format_exc())
+    finally:
+        # Views must be gone before the block is closed
+        del env, arrays, out
+        shm.close()
+        pipe.close()
+
+
+class SubprocVecFootball:
+    """
+    VecFootball spread over worker processes, every worker steps it's share
+    of the envs as one batch. Actions, states, rewards and dones live in a
+    shared memory block, the pipes only carry the commands.
+    reset() and step() return copies of the block, or copy into out when it's
+    given. The block itself is read in place through the states, rewards,
+    dones and terminal_states attributes, overwritten by the next call.
+    """
+
+    def __init__(self, env_count: int = 1, worker_count: int = None, random_ball: bool = False, rays: bool = False,
+                 frame_skip: int = 1, array_step: bool = False, seed: int = None, start_method: str = 'spawn') -> None:
+        """
+        worker_count: Processes to use, one per cpu (at most env_count) by default
+        seed: Seeds np.random of worker i with seed + i
+        start_method: multiprocessing start method, spawn is safe after pygame or torch were initialized
+        """
+        self.env_count = env_count
+        self.worker_count = min(worker_count or mp.cpu_count(), env_count)
+        self.state_size = RAY_STATE_SPACE_SIZE if rays else STATE_SPACE_SIZE
+        self.closed = True
+        self.shm = shared_memory.SharedMemory(create=True, size=shared_arrays(None, env_count, self.state_size)['nbytes'])
+        arrays = shared_arrays(self.shm.buf, env_count, self.state_size)
+        self.actions = arrays['actions']
+        self.states = arrays['states']
+        self.terminal_states = arrays['terminal_states']
+        self.rewards = arrays['rewards']
+        self.dones = arrays['dones']
+        kwargs = dict(random_ball=random_ball, rays=rays, frame_skip=frame_skip, array_step=array_step)
+        bounds = np.linspace(0, env_count, self.worker_count + 1).astype(int)
+        # Env rows of the two halves used by double buffering, whole workers each
+        self.halves = (slice(0, int(bounds[self.worker_count // 2])), slice(int(bounds[self.worker_count // 2]), env_count))
+        ctx = mp.get_context(start_method)
+        self.pipes = []
+        self.workers = []
+        for i in range(self.worker_count):
+            pipe, child = ctx.Pipe()
+            worker = ctx.Process(target=vec_worker,
+                                 args=(child, self.shm.name, env_count, bounds[i], bounds[i + 1], self.state_size,
+                                       kwargs, None if seed is None else seed + i),
+                                 daemon=True)
+            worker.start()
+            child.close()
+            self.pipes.append(pipe)
+            self.workers.append(worker)
+        self.pending = [True] * self.worker_count
+        self.closed = False
+        self.wait()
+
+    def workers_of(self, half: int = None) -> range:
+        """ Workers stepping every env (None) or one of the halves (0, 1) """
+        if half is None:
+            return range(self.worker_count)
+        if self.worker_count < 2:
+            raise ValueError("Double buffering needs at least two workers")
+        if half == 0:
+            return range(0, self.worker_count // 2)
+        return range(self.worker_count // 2, self.worker_count)
+
+    def send(self, cmd: str, workers: range = None):
+        for i in range(self.worker_count) if workers is None else workers:
+            if self.pending[i]:
+                raise RuntimeError("Previous command of the worker was not waited for")
+            self.pipes[i].send(cmd)
+            self.pending[i] = True
+
+    def wait(self, workers: range = None):
+        """ Blocks until the workers finished their last command """
+        errors = []
+        for i in range(self.worker_count) if workers is None else workers:
+            if self.pending[i]:
+                errors.append(self.pipes[i].recv())
+                self.pending[i] = False
+        for error in errors:
+            if error is not None:
+                self.close()
+                raise RuntimeError("SubprocVecFootball worker failed\n" + error)
+
+    def reset(self, out: np.ndarray = None) -> np.ndarray:
+        """ out: (N, state size) float32 array the first states are copied into and returned """
+        self.send('reset')
+        self.wait()
+        if out is None:
+            return self.states.copy()
+        np.copyto(out, self.states)
+        return out
+
+    def step_async(self, actions: np.ndarray, half: int = None):
+        """
+        Starts stepping every env, or only one half of them, and returns at once.
+        actions: (N,) Action of every env, (rows of the half,) with half
+        half: None, 0 or 1. Double buffering steps one half while the policy
+              runs on the other half's states:
+                  env.step_async(policy(states[env.halves[0]]), 0)
+                  while ...:
+                      env.step_async(policy(states[env.halves[1]]), 1)
+                      states_0, rewards_0, dones_0 = env.step_wait(0)
+                      ...
+                      env.step_async(policy(states_0), 0)
+                      states_1, rewards_1, dones_1 = env.step_wait(1)
+              The shared rows of a half must not be read while it's stepping.
+              Agents keep rollout state between policy and learn, one agent
+              steps both halves through RL.HalfAgent.
+        """
+        rows = slice(None) if half is None else self.halves[half]
+        self.actions[rows] = actions
+        self.send('step', self.workers_of(half))
+
+    def step_wait(self, half: int = None, out: tuple = None):
+        """
+        Waits for step_async, returns the states, rewards and dones of it's rows
+        out: (states, rewards, dones) arrays the rows are copied into and returned
+        """
+        rows = slice(None) if half is None else self.halves[half]
+        self.wait(self.workers_of(half))
+        if out is None:
+            return self.states[rows].copy(), self.rewards[rows].copy(), self.dones[rows].copy()
+        for dst, src in zip(out, (self.states[rows], self.rewards[rows], self.dones[rows])):
+            np.copyto(dst, src)
+        return out
+
+    def step(self, actions: np.ndarray, out: tuple = None):
+        """
+        actions: (N,) Action of every env
+        Returns (N, state size) states, (N,) rewards and (N,) dones, finished envs are reset
+        """
+        self.step_async(actions)
+        return self.step_wait(out=out)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for i, pipe in enumerate(self.pipes):
+            try:
+                if self.pending[i]:
+                    pipe.recv()
+                pipe.send('close')
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+        for worker in self.workers:
+            worker.join(5)
+            if worker.is_alive():
+                worker.terminate()
+        for pipe in self.pipes:
+            pipe.close()
+        del self.actions, self.states, self.terminal_states, self.rewards, self.dones
+        self.shm.close()
+        self.shm.unlink()
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,59 @@
+from football import Football, TEAM_RIGHT, ACTIONS
+import numpy as np
+
+
+ACTION_SPACE_SIZE = ACTIONS.__len__()
+
+
+class MAFootball(Football):
+    """
+    Full match with goalkeepers where every player is an agent, both teams
+    are stepped together and observe the field with Football.observe
+    """
+
+    def __init__(self, window, size, fps, team_size, array_step: bool = False, sleep: bool = True, time_limit: int = 60) -> None:
+        """
+        time_limit: Seconds of play before the episode ends
+        """
+        super().__init__(window, size, fps, team_size, True, array_step, False, sleep)
+        self.player_count = self.players.__len__()
+        self.state_size = self.observation_size
+        self.max_steps = fps * time_limit
+        # +1 for TEAM_RIGHT players, -1 for TEAM_LEFT, goals are rewarded to a team
+        self.team_sign = np.array([1 if player.team_id == TEAM_RIGHT else -1 for player in self.players], dtype=np.float64)
+        self.states = np.zeros((self.player_count, self.state_size), dtype=np.float32)
+        self.rewards = np.zeros(self.player_count)
+        self.counter = 0
+        self.done = False
+
+    def reset(self) -> np.ndarray:
+        """ Returns the (players, state_size) states, overwritten by the next step """
+        super().reset()
+        self.counter = 0
+        self.done = False
+        self.settle()
+        return self.observe(self.states)
+
+    def get_counters(self) -> list:
+        return super().get_counters() + [self.counter, self.done]
+
+    def set_counters(self, counters) -> None:
+        super().set_counters(counters)
+        self.counter = int(counters[3])
+        self.done = bool(counters[4])
+
+    def step(self, actions):
+        """
+        actions: (players,) Action of every player
+        Returns (players, state_size) states, (players,) rewards and done,
+        the arrays are overwritten by the next step
+        """
+        left = self.teamLeft.score
+        right = self.teamRight.score
+        self.tick(actions)
+        left = self.teamLeft.score - left
+        right = self.teamRight.score - right
+        self.rewards[:] = self.team_sign * (right - left)
+        self.counter += 1
+        self.done = bool(left or right or self.ball.is_out or self.counter >= self.max_steps)
+        return self.observe(self.states), self.rewards, self.done
@@ -1,114 +1,23 @@
 from Game import Game
 from Game import core
-from Game.graphic import CartesianPlane
-from Game.physics import StaticRectangleBody
-from football import Football, NOOP, BALL_SPEED_MAX, STOP, GO_FORWARD, TURN_LEFT, TURN_RIGHT, KICK, GOAL_AREA_WIDTH, RAY_COUNT
+from football import NOOP, STOP, GO_FORWARD, TURN_LEFT, TURN_RIGHT, KICK
+from headless_envs import (RLFootball, RLFootballBatch, VecFootball, SubprocVecFootball, make_reset_pool,  # noqa: F401
+                           ACTION_SPACE_SIZE, STATE_SPACE_SIZE, RAY_STATE_SPACE_SIZE, STATE_DTYPE)
 import numpy as np
 
 
-ACTION_SPACE_SIZE = 6
-STATE_SPACE_SIZE = 9  # + RAY_COUNT
-
-
-class RLFootball(Football):
-
-    def __init__(self, window, size, fps, team_size, full: bool = True) -> None:
-        super().__init__(window, size, fps, team_size, full)
-        self.counter = 0
-        self.done = False
-
-    def step(self, actions: list = None):
-        super().step(actions)
-        self.counter += 1
-        if self.counter == (self.fps * 10):
-            self.done = True
-        ball_pos = self.ball.position()
-        if self.ball.is_out or ball_pos[0] < 0 or ball_pos[0] > self.size[0] // 2 - GOAL_AREA_WIDTH \
-                or ball_pos[1] < -self.size[1] // 2 + GOAL_AREA_WIDTH // 2 or ball_pos[1] > self.size[1] // 2 - GOAL_AREA_WIDTH // 2:
-            self.done = True
-        if self.teamRight.score:
-            self.done = True
-            reward = self.fps * 10
-        elif self.done and not self.teamRight.score:
-            reward = -1
-        else:
-            reward = -1
-        return self.get_state(), reward, self.done
-
-    def get_state(self):
-        state = []
-        # state.extend(self.sensors[0].get_state())
-        ball_pos = self.ball.position()
-        ball_dir = self.ball.direction() / 360
-        ball_spd = self.ball.speed() / BALL_SPEED_MAX
-        player_pos = self.players[0].position()
-        player_dir = self.players[0].direction() / 360
-        player_spd = self.players[0].speed() / self.players[0].PLAYER_MAX_SPEED
-        has_ball = self.players[0].has_ball
-        state.extend([ball_pos[0] / self.plane.x_max,
-                      ball_pos[1] / self.plane.y_max,
-                      ball_dir,
-                      ball_spd,
-                      player_pos[0] / self.plane.x_max,
-                      player_pos[1] / self.plane.y_max,
-                      player_dir,
-                      player_spd,
-                      has_ball])
-        return np.array(state)
-
-    def reset(self, random_ball=False):
-        self.counter = 0
-        self.done = False
-        x = 300
-        y = 0
-        if random_ball:
-            # y_lim = (self.plane.window_size[1] - GOAL_AREA_WIDTH) / 2
-            # x = np.random.randint(0, self.plane.x_max - GOAL_AREA_WIDTH + 1)
-            # y = np.random.randint(-y_lim, y_lim + 1)
-            x = 100
-            y = 200
-        self.ball.reset((x, y))
-        self.teamRight.reset()
-        self.engine.step()
-        self.ball.step()
-        self.check_ball()
-        return self.get_state()
-
-    def create_wall(self, wall_width=120, wall_height=5):
-        y = self.size[1] // 2 - wall_width // 2 - wall_height // 2
-        pad = 40
-        for _ in range(self.size[1] // wall_width):
-            self.bodies.append(
-                StaticRectangleBody(-1,
-                                    CartesianPlane(self.window, (wall_width, wall_width),
-                                                   self.plane.createVector(-pad // 2, y)),
-                                    (wall_height, wall_width)))
-            self.bodies.append(
-                StaticRectangleBody(-1,
-                                    CartesianPlane(self.window, (wall_width, wall_width),
-                                                   self.plane.createVector(self.size[0] // 2 - GOAL_AREA_WIDTH + pad, y)),
-                                    (wall_height, wall_width)))
-            y -= wall_width
-
-        x = 0
-        for _ in range(self.size[0] // wall_width):
-            vec = self.plane.createVector(x, self.size[1] // 2 - GOAL_AREA_WIDTH // 2 + pad)
-            self.bodies.append(
-                StaticRectangleBody(-1,
-                                    CartesianPlane(self.window, (wall_width, wall_width), vec),
-                                    (wall_width, wall_height)))
-            vec = self.plane.createVector(x, -self.size[1] // 2 + GOAL_AREA_WIDTH // 2 - pad)
-            self.bodies.append(
-                StaticRectangleBody(-1,
-                                    CartesianPlane(self.window, (wall_width, wall_width), vec),
-                                    (wall_width, wall_height)))
-            x += wall_width
-
-
 class SinglePlayerFootball(Game):
 
-    def __init__(self, title: str = 'Single Agent train', random_ball: bool = False) -> None:
-        super().__init__()
+    def __init__(self, title: str = 'Single Agent train', random_ball: bool = False, frame_skip: int = 1,
+                 offscreen: bool = False, render_every: int = 1, realtime: bool = True) -> None:
+        """
+        offscreen: Draw without a display, frames are read with get_frame or render_frame
+        render_every: Steps per drawn frame, 0 never draws
+        realtime: Pace drawn frames to fps, False steps as fast as possible
+        """
+        super().__init__(offscreen)
+        self.render_every = render_every
+        self.set_realtime(realtime)
         self.size = (1920, 1080)
         self.fps = 30
         self.set_window()
@@ -116,10 +25,11 @@ class SinglePlayerFootball(Game):
         self.env: RLFootball = None
         self.team_size = 1
         self.random_ball = random_ball
+        self.frame_skip = frame_skip
         self.setup()
 
     def setup(self):
-        self.env = RLFootball(self.window, self.size, self.fps, self.team_size, False)
+        self.env = RLFootball(self.window, self.size, self.fps, self.team_size, False, frame_skip=self.frame_skip)
         self.env.reset(self.random_ball)
 
     def reset(self):
@@ -163,51 +73,66 @@ class SinglePlayerFootball(Game):
 
 class SinglePlayerFootballParallel(Game):
 
-    def __init__(self, env_count: int = 1, title: str = 'Single Agent train', random_ball: bool = False) -> None:
-        super().__init__()
+    def __init__(self, env_count: int = 1, title: str = 'Single Agent train', random_ball: bool = False, rays: bool = False,
+                 frame_skip: int = 1, array_step: bool = False, offscreen: bool = False,
+                 render_every: int = 1, render_env: int = None, realtime: bool = True) -> None:
+        """
+        offscreen: Draw without a display, frames are read with get_frame or render_frame
+        render_every: Steps per drawn frame, 0 never draws
+        render_env: Only draw this env, all of them overlaid if None
+        realtime: Pace drawn frames to fps, False steps as fast as possible
+        """
+        super().__init__(offscreen)
+        self.render_every = render_every
+        self.render_env = render_env
+        self.set_realtime(realtime)
         self.size = (1920, 1080)
         self.fps = 30
         self.set_window()
         self.set_title(title)
         self.env_count = env_count
         self.random_ball = random_ball
+        self.rays = rays
+        self.frame_skip = frame_skip
+        self.array_step = array_step
+        self.state_size = RAY_STATE_SPACE_SIZE if rays else STATE_SPACE_SIZE
         self.envs: list[RLFootball] = []
+        self.batch: RLFootballBatch = None
         self.team_size = 1
         self.setup()
 
     def setup(self):
         for _ in range(self.env_count):
-            self.envs.append(RLFootball(self.window, self.size, 30, self.team_size, False))
+            self.envs.append(RLFootball(self.window, self.size, 30, self.team_size, False, self.array_step, rays=self.rays,
+                                        frame_skip=self.frame_skip))
             self.envs[-1].reset(self.random_ball)
+        self.batch = RLFootballBatch(self.envs, self.random_ball)
 
     def reset(self):
-        states = np.zeros((self.env_count, STATE_SPACE_SIZE))
-        for i in range(self.env_count):
-            states[i] = self.envs[i].reset(random_ball=self.random_ball)
+        states = np.zeros((self.env_count, self.state_size), dtype=STATE_DTYPE)
+        self.batch.reset(states)
         return states
 
     def step(self, actions: np.ndarray):
-        next_states = np.zeros((self.env_count, STATE_SPACE_SIZE))
+        next_states = np.zeros((self.env_count, self.state_size), dtype=STATE_DTYPE)
         rewards = np.zeros(self.env_count)
         dones = np.zeros(self.env_count)
-        for i in range(self.env_count):
-            next_states[i], rewards[i], dones[i] = self.envs[i].step([actions[i]])
+        self.batch.step(actions, next_states, rewards, dones)
         self.loop_once()
-        for i in range(self.env_count):
-            for j in range(self.envs[i].sensors.__len__()):
-                self.envs[i].sensors[j].reset()
         return next_states, rewards, dones
 
     def onEvent(self, event):
         if event.type == core.KEYUP:
             if event.key == core.K_q:
                 self.running = False
-                for env in self.envs:
-                    env.done = True
+                self.batch.done[:] = True
             if event.key == core.K_SPACE:
                 self.rendering = not self.rendering
 
     def onRender(self):
         self.window.fill((255, 255, 255))
+        if self.render_env is not None:
+            self.envs[self.render_env].show()
+            return
         for i in range(self.env_count):
             self.envs[i].show()
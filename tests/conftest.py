@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Worlds are built headless, the Cython extensions must be built in place first:
+#   python cython_setup.py build_ext --inplace
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
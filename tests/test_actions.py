@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from football import GO_FORWARD, TURN_LEFT, KICK
+from headless_envs import RLFootball
+
+
+def rollout(actions, seed=0):
+    np.random.seed(seed)
+    env = RLFootball(None, (1920, 1080), 30, 1, False)
+    env.reset()
+    states = []
+    for action in actions:
+        state, reward, done = env.step([action])
+        states.append(state)
+        if done:
+            break
+    return np.array(states)
+
+
+@pytest.mark.parametrize("wrap", [np.array, lambda a: np.array(a, dtype=np.int32), lambda a: np.int64(a[0])])
+def test_policy_shaped_actions_step_like_ints(wrap):
+    """ DeepQNetworkAgent and ActorCriticAgent return (1,) arrays for a single state """
+    actions = [GO_FORWARD] * 20 + [TURN_LEFT] * 5 + [KICK] + [GO_FORWARD] * 10
+    expected = rollout(actions)
+    got = rollout([wrap([a]) for a in actions])
+    assert np.array_equal(expected, got)
+
+
+def test_policy_shaped_actions_for_every_player():
+    np.random.seed(0)
+    env = RLFootball(None, (1920, 1080), 30, 2, False)
+    env.reset()
+    env.step([np.array([GO_FORWARD]), np.array([TURN_LEFT])])
+    env.step(np.array([[GO_FORWARD], [KICK]]))
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+from RL import DeepQNetworkAgent  # noqa: E402
+from RL.utils import ReplayBuffer  # noqa: E402
+
+STATE_SIZE = 4
+ENVS = 3
+
+
+class Linear(torch.nn.Module):
+
+    def __init__(self, state_space_size, action_space_size):
+        super().__init__()
+        self.layer = torch.nn.Linear(state_space_size, action_space_size)
+
+    def forward(self, x):
+        return self.layer(x)
+
+
+def make_agent(min_size):
+    agent = DeepQNetworkAgent(STATE_SIZE, 2)
+    agent.create_model(Linear, 0.001, 0.99, batch=4)
+    agent.create_buffer(ReplayBuffer(64, min_size, STATE_SIZE))
+    return agent
+
+
+@pytest.mark.parametrize('wrap', [list, tuple, np.array])
+def test_policy_takes_lists_and_tuples(wrap):
+    agent = make_agent(4)
+    assert agent.policy(wrap([0.0] * STATE_SIZE)).shape == (1,)
+    assert agent.policy(wrap([[0.0] * STATE_SIZE] * ENVS)).shape == (ENVS,)
+
+
+def test_learn_batch_counts_rewards_once_trainable():
+    agent = make_agent(2 * ENVS)
+    states = np.zeros((ENVS, STATE_SIZE), dtype=np.float32)
+    actions = np.zeros(ENVS, dtype=np.int64)
+    rewards = np.ones(ENVS)
+    # Episodes that end while the buffer fills up are not counted, same as learn
+    agent.learn(states, actions, states, rewards, np.array([True, False, False]))
+    assert agent.reward_history == [] and agent.train_count == 0
+    agent.learn(states, actions, states, rewards, np.array([False, True, False]))
+    # Counted from the first trainable step only
+    assert agent.reward_history == [1.0]
+    agent.learn(states, actions, states, rewards, np.array([False, True, True]))
+    assert agent.reward_history == [1.0, 1.0, 2.0]
+    assert agent.train_count == 2
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+from RL import Agent, DeepQNetworkAgent, HalfAgent  # noqa: E402
+
+
+class CountingAgent(Agent):
+    """ Keeps a per env rollout like the real agents, policy and learn must see the same half """
+    rollout_fields = Agent.rollout_fields + ('env_steps',)
+
+    def __init__(self, env_count):
+        super().__init__(1, 2)
+        self.env_steps = np.zeros(env_count)
+
+    def policy(self, states):
+        self.step_counter += 1
+        return np.zeros(states.shape[0], dtype=np.int64)
+
+    def learn(self, states, actions, next_states, rewards, dones):
+        assert self.env_steps.shape[0] == states.shape[0]
+        self.env_steps += 1
+        self.rewards.append(rewards.sum())
+
+
+def test_halves_keep_their_own_rollout():
+    halves = (slice(0, 2), slice(2, 5))
+    agent = HalfAgent(CountingAgent(5), halves)
+    states = np.zeros((5, 1))
+    for t in range(3):
+        for half in (0, 1):
+            rows = halves[half]
+            actions = agent.policy(states[rows], half)
+            agent.learn(states[rows], actions, states[rows], np.ones(rows.stop - rows.start), np.zeros(0), half)
+        if t == 0:
+            # Extra policy and learn calls of one half don't move the other
+            agent.learn(states[:2], None, states[:2], np.ones(2), np.zeros(0), 0)
+    agent.use(1)
+    assert agent.agent.step_counter == 3
+    assert agent.agent.rewards == [3.0] * 3
+    np.testing.assert_array_equal(agent.agent.env_steps, [3, 3, 3])
+    agent.use(0)
+    assert agent.agent.step_counter == 3
+    np.testing.assert_array_equal(agent.agent.env_steps, [4, 4])
+
+
+def test_env_epsilons_are_split():
+    agent = DeepQNetworkAgent(9, 6)
+    agent.create_env_epsilons(6)
+    env_e = np.copy(agent.env_e)
+    half_agent = HalfAgent(agent, (slice(0, 3), slice(3, 6)))
+    np.testing.assert_array_equal(half_agent.use(1).env_e, env_e[3:])
+    np.testing.assert_array_equal(half_agent.use(0).env_e, env_e[:3])
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_without_pygame(code, tmp_path):
+    """ Runs code in a fresh interpreter (and it's children) where importing pygame fails """
+    (tmp_path / 'pygame.py').write_text("raise ImportError('pygame imported by a headless env')\n")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(tmp_path), ROOT]))
+    subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True, timeout=120)
+
+
+def test_headless_envs_do_not_import_pygame(tmp_path):
+    run_without_pygame("import numpy as np\n"
+                       "from headless_envs import RLFootball, VecFootball\n"
+                       "env = VecFootball(2)\n"
+                       "env.reset()\n"
+                       "env.step(np.zeros(2, dtype=np.int64))\n"
+                       "RLFootball(None, (1920, 1080), 30, 1, False).reset()\n", tmp_path)
+
+
+def test_subproc_workers_do_not_import_pygame(tmp_path):
+    run_without_pygame("import numpy as np\n"
+                       "from headless_envs import SubprocVecFootball\n"
+                       "env = SubprocVecFootball(2, worker_count=2, seed=0)\n"
+                       "env.reset()\n"
+                       "env.step(np.zeros(2, dtype=np.int64))\n"
+                       "env.close()\n", tmp_path)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+from RL.utils import MemmapReplayBuffer, ReplayBuffer  # noqa: E402
+
+ENVS = 4
+STATE_SIZE = 3
+
+
+def fill(buffer, steps, seed=0, episode_every=1):
+    """ ENVS envs stepping together, one of them starts a new episode every episode_every steps """
+    rng = np.random.default_rng(seed)
+    states = rng.normal(size=(ENVS, STATE_SIZE)).astype(np.float32)
+    transitions = []
+    for t in range(steps):
+        next_states = rng.normal(size=(ENVS, STATE_SIZE)).astype(np.float32)
+        buffer.extend(states, np.arange(ENVS), next_states, np.full(ENVS, t), np.zeros(ENVS))
+        transitions += list(zip(states, next_states))
+        states = np.copy(next_states)
+        if t % episode_every == 0:
+            states[t // episode_every % ENVS] = rng.normal(size=STATE_SIZE)
+    return transitions
+
+
+def kept(buffer):
+    idx = np.arange(buffer.tail, buffer.head) % buffer.max_size
+    return (np.asarray(buffer.frames[buffer.state_frame[idx] % buffer.frame_size]),
+            np.asarray(buffer.frames[buffer.next_frame[idx] % buffer.frame_size]))
+
+
+def test_rows_reuse_frames_on_their_own(tmp_path):
+    buffer = MemmapReplayBuffer(64, 1, STATE_SIZE, str(tmp_path))
+    fill(buffer, 5)
+    # The first push writes both states, then one new state per push besides the next states
+    assert buffer.frame_head == 2 * ENVS + 4 * (ENVS + 1)
+
+
+def test_default_frames_keep_max_size(tmp_path):
+    """ About one frame per transition, episodes of 64 steps fit in the default headroom """
+    buffer = MemmapReplayBuffer(4096, 1, STATE_SIZE, str(tmp_path))
+    assert buffer.frame_size < 1.1 * buffer.max_size + MemmapReplayBuffer.FRAME_BATCH_HEADROOM
+    transitions = fill(buffer, 3 * 4096 // ENVS, episode_every=64 // ENVS)
+    assert buffer.tail == buffer.head - buffer.max_size and buffer.is_full
+    states, next_states = kept(buffer)
+    np.testing.assert_array_equal(states, [s for s, _ in transitions[-4096:]])
+    np.testing.assert_array_equal(next_states, [ns for _, ns in transitions[-4096:]])
+
+
+def test_smaller_on_disk_than_replay_buffer(tmp_path):
+    max_size = 100_000
+    buffer = MemmapReplayBuffer(max_size, 1, 9, str(tmp_path))
+    buffer.flush()
+    disk = sum((tmp_path / (name + '.dat')).stat().st_size for name in MemmapReplayBuffer.FILES)
+    dense = ReplayBuffer(max_size, 1, 9)
+    memory = sum(a.nbytes for a in (dense.state_buffer, dense.next_state_buffer, dense.action_buffer,
+                                    dense.reward_buffer, dense.done_buffer))
+    assert disk < 0.8 * memory
+
+
+def test_few_frames_drop_oldest_and_set_full(tmp_path):
+    buffer = MemmapReplayBuffer(40, 1, STATE_SIZE, str(tmp_path), frame_size=30)
+    transitions = fill(buffer, 30)
+    assert 0 < len(buffer) < buffer.max_size and buffer.is_full and buffer.trainable
+    states, next_states = kept(buffer)
+    np.testing.assert_array_equal(states, [s for s, _ in transitions[buffer.tail:]])
+    np.testing.assert_array_equal(next_states, [ns for _, ns in transitions[buffer.tail:]])
+
+
+@pytest.mark.parametrize('shape', [STATE_SIZE, (STATE_SIZE,), [STATE_SIZE], np.int64(STATE_SIZE)])
+def test_reopen(tmp_path, shape):
+    buffer = MemmapReplayBuffer(64, 1, (STATE_SIZE,), str(tmp_path), state_dtype=np.float16)
+    fill(buffer, 10)
+    buffer.flush()
+    np.random.seed(0)
+    expected = buffer.sample(32)
+    counters = (buffer.head, buffer.tail, buffer.frame_head, buffer.batch_max)
+    del buffer
+
+    reopened = MemmapReplayBuffer(64, 1, shape, str(tmp_path), state_dtype=np.float16)
+    assert (reopened.head, reopened.tail, reopened.frame_head, reopened.batch_max) == counters
+    np.random.seed(0)
+    for a, b in zip(expected, reopened.sample(32)):
+        np.testing.assert_array_equal(a, b)
+    # Pushes go on reusing the frames of the last one
+    frame_head = reopened.frame_head
+    states = np.asarray(reopened.frames[reopened.last_next_frame % reopened.frame_size])
+    reopened.extend(states, np.zeros(ENVS), states, np.zeros(ENVS), np.zeros(ENVS))
+    assert reopened.frame_head == frame_head + ENVS
+
+
+def test_reopen_with_other_settings(tmp_path):
+    MemmapReplayBuffer(64, 1, STATE_SIZE, str(tmp_path)).flush()
+    with pytest.raises(ValueError):
+        MemmapReplayBuffer(64, 1, STATE_SIZE + 1, str(tmp_path))
@@ -0,0 +1,53 @@
+import threading
+import numpy as np
+from headless_envs import RLFootball
+from football import ResetPool
+
+
+def counting_world(calls):
+    world = RLFootball(None, (1920, 1080), 30, 1, False)
+    settle = world.settle
+
+    def counted():
+        calls.append(threading.current_thread())
+        settle()
+    world.settle = counted
+    return world
+
+
+def test_background_get_waits_for_the_refill_thread():
+    calls = []
+    pool = ResetPool(counting_world(calls), size=16, background=True, seed=0)
+    try:
+        # The first get arrives while the thread is still settling the batch
+        state = pool.get()
+        assert state.ndim == 1
+        for _ in range(15):
+            pool.get()
+        assert all(thread is pool.thread for thread in calls)
+    finally:
+        pool.close()
+    pool.thread.join(5)
+    # One batch, then the refill asked for by the gets past the half
+    assert calls.__len__() in range(16, 33)
+
+
+def test_closed_pool_fills_on_the_caller():
+    calls = []
+    pool = ResetPool(counting_world(calls), size=4, background=True, seed=0)
+    pool.close()
+    pool.thread.join(5)
+    while pool.states:
+        pool.get()
+    pool.get()
+    assert calls[-1] is threading.current_thread()
+
+
+def test_pool_without_thread_fills_on_demand():
+    np.random.seed(0)
+    calls = []
+    pool = ResetPool(counting_world(calls), size=4, seed=0)
+    env = RLFootball(None, (1920, 1080), 30, 1, False)
+    env.reset_pool = pool
+    env.reset()
+    assert calls.__len__() == 4 and pool.states.__len__() == 3
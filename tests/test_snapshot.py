@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from multi_agent_envs import MAFootball
+from headless_envs import RLFootball
+
+
+def positions(env):
+    return np.array([player.position() for player in env.players] + [env.ball.position()])
+
+
+def ma_football():
+    env = MAFootball(None, (1920, 1080), 30, 2, time_limit=2)
+    env.reset()
+    return env, lambda actions: env.step(actions[:env.player_count])
+
+
+def rl_football():
+    env = RLFootball(None, (1920, 1080), 30, 1, False)
+    env.reset()
+    return env, lambda actions: env.step(actions[:1])
+
+
+@pytest.mark.parametrize('make', [ma_football, rl_football])
+def test_rewind_restores_counters_and_positions(make):
+    np.random.seed(0)
+    env, step = make()
+    actions = np.random.default_rng(0).integers(0, 6, (200, 8))
+    for t in range(20):
+        step(actions[t])
+    snapshot = env.snapshot()
+    counters = env.get_counters()
+    start = positions(env)
+
+    def play():
+        trace = []
+        for t in range(20, 200):
+            state, reward, done = step(actions[t])
+            trace.append((np.copy(state), np.copy(reward), done, env.counter, positions(env)))
+            if done:
+                break
+        return trace
+
+    first = play()
+    # Played past the snapshot, the counter moved on
+    assert env.counter > counters[3]
+
+    env.restore(snapshot)
+    assert env.get_counters() == counters
+    assert env.counter == counters[3] and env.done is False
+    np.testing.assert_array_equal(positions(env), start)
+
+    second = play()
+    assert first.__len__() == second.__len__()
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a[0], b[0])
+        np.testing.assert_array_equal(a[1], b[1])
+        assert a[2:4] == b[2:4]
+        np.testing.assert_array_equal(a[4], b[4])
+
+
+def test_restore_clears_done():
+    np.random.seed(0)
+    env = MAFootball(None, (1920, 1080), 30, 2, time_limit=1)
+    env.reset()
+    snapshot = env.snapshot()
+    done = False
+    while not done:
+        _, _, done = env.step(np.zeros(env.player_count, dtype=np.int64))
+    assert env.counter == env.max_steps
+    env.restore(snapshot)
+    assert env.counter == 0 and env.done is False
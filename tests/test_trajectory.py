@@ -0,0 +1,70 @@
+"""
+Seeded matches against trajectories recorded with the current engine.
+The step order (every body stepped, then contacts resolved in grid
+order) differs from the old all-pairs loop, these pin it down.
+Rerecord after an intended physics change with
+    python tests/test_trajectory.py
+"""
+import os
+import numpy as np
+import pytest
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'trajectories.npz')
+STEPS = 300
+
+
+def full_match(array_step: bool = False, sleep: bool = True) -> np.ndarray:
+    """ (STEPS, players + 1, 2) positions of a seeded 4v4 match with goalkeepers """
+    from football import Football
+    np.random.seed(0)
+    env = Football(None, (1920, 1080), 30, 4, True, array_step, rays=False, sleep=sleep)
+    env.reset()
+    actions = np.random.default_rng(0).integers(0, 6, (STEPS, env.players.__len__()))
+    out = np.zeros((STEPS, env.players.__len__() + 1, 2))
+    for t in range(STEPS):
+        env.step(actions[t])
+        out[t, :-1] = [player.position() for player in env.players]
+        out[t, -1] = env.ball.position()
+    return out
+
+
+def single_player(array_step: bool = False) -> np.ndarray:
+    """ (STEPS, 9) states of seeded RLFootball episodes """
+    from headless_envs import RLFootball
+    np.random.seed(1)
+    env = RLFootball(None, (1920, 1080), 30, 1, False, array_step)
+    env.reset()
+    actions = np.random.default_rng(1).integers(0, 6, STEPS)
+    out = np.zeros((STEPS, env.state_size))
+    for t in range(STEPS):
+        out[t], _, done = env.step([actions[t]])
+        if done:
+            env.reset()
+    return out
+
+
+@pytest.fixture(scope='module')
+def recorded():
+    return np.load(DATA)
+
+
+@pytest.mark.parametrize('array_step', [False, True])
+def test_full_match(recorded, array_step):
+    np.testing.assert_allclose(full_match(array_step), recorded['full_match'], rtol=0, atol=1e-6)
+
+
+def test_full_match_without_sleep(recorded):
+    # Sleeping bodies are skipped, not approximated
+    np.testing.assert_allclose(full_match(sleep=False), recorded['full_match'], rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize('array_step', [False, True])
+def test_single_player(recorded, array_step):
+    np.testing.assert_allclose(single_player(array_step), recorded['single_player'], rtol=0, atol=1e-6)
+
+
+if __name__ == '__main__':
+    import conftest  # noqa: F401, headless and repo root on sys.path
+    os.makedirs(os.path.dirname(DATA), exist_ok=True)
+    np.savez_compressed(DATA, full_match=full_match(), single_player=single_player())
+    print("recorded", DATA)
@@ -0,0 +1,73 @@
+import numpy as np
+from headless_envs import VecFootball, SubprocVecFootball, STATE_DTYPE
+
+ENVS = 3
+STEPS = 400
+
+
+def actions():
+    return np.random.default_rng(0).integers(0, 6, (STEPS, ENVS))
+
+
+def rollout(out: bool, array_step: bool = False):
+    np.random.seed(0)
+    env = VecFootball(ENVS, array_step=array_step)
+    buffers = (np.zeros((ENVS, env.state_size), dtype=STATE_DTYPE), np.zeros(ENVS), np.zeros(ENVS, dtype=bool))
+    first = env.reset(buffers[0] if out else None)
+    trace = [np.copy(first)]
+    for action in actions():
+        result = env.step(action, buffers if out else None)
+        if out:
+            assert all(a is b for a, b in zip(result, buffers))
+        trace.append(tuple(np.copy(a) for a in result))
+    return trace
+
+
+def test_vec_step_returns_new_arrays():
+    np.random.seed(0)
+    env = VecFootball(ENVS)
+    states = env.reset()
+    kept = np.copy(states)
+    step = env.step(np.zeros(ENVS, dtype=np.int64))
+    # Stepping leaves the earlier result alone
+    np.testing.assert_array_equal(states, kept)
+    kept = [np.copy(a) for a in step]
+    env.step(np.full(ENVS, 1, dtype=np.int64))
+    for a, b in zip(step, kept):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_vec_out_matches_copies():
+    copied = rollout(False)
+    written = rollout(True)
+    np.testing.assert_array_equal(copied[0], written[0])
+    assert any(step[2].any() for step in copied[1:]), "no episode ended"
+    for a, b in zip(copied[1:], written[1:]):
+        for x, y in zip(a, b):
+            np.testing.assert_array_equal(x, y)
+
+
+def test_batch_world_matches_object_step():
+    """ One integrate pass over the stacked rows of every world """
+    copied = rollout(False)
+    stacked = rollout(False, array_step=True)
+    np.testing.assert_array_equal(copied[0], stacked[0])
+    for a, b in zip(copied[1:], stacked[1:]):
+        for x, y in zip(a, b):
+            np.testing.assert_allclose(x, y, rtol=0, atol=1e-6)
+
+
+def test_subproc_step_returns_copies():
+    env = SubprocVecFootball(ENVS, worker_count=1, seed=0)
+    try:
+        states = env.reset()
+        assert not np.shares_memory(states, env.states)
+        result = env.step(np.zeros(ENVS, dtype=np.int64))
+        for a, b in zip(result, (env.states, env.rewards, env.dones)):
+            assert not np.shares_memory(a, b)
+            np.testing.assert_array_equal(a, b)
+        out = tuple(np.zeros_like(a) for a in result)
+        assert env.step(np.zeros(ENVS, dtype=np.int64), out) is out
+        np.testing.assert_array_equal(out[0], env.states)
+    finally:
+        env.close()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from football import Football
+
+
+def make(array_step):
+    np.random.seed(0)
+    env = Football(None, (1920, 1080), 30, 2, True, array_step, rays=False)
+    env.reset()
+    return env
+
+
+@pytest.mark.parametrize('array_step', [False, True])
+def test_world_mirrors_bodies_after_every_step(array_step):
+    env = make(array_step)
+    world = env.engine.world
+    rng = np.random.default_rng(0)
+    for _ in range(60):
+        env.step(rng.integers(0, 6, env.players.__len__()))
+        for player in env.players:
+            # Players are rows of the world, in the engine's body order
+            assert tuple(player.position()) in set(map(tuple, world.position))
+
+
+def test_world_arrays_are_read_only():
+    world = make(True).engine.world
+    for name in ('position', 'velocity', 'heading', 'radius', 'type', 'flags'):
+        with pytest.raises(ValueError):
+            getattr(world, name)[0] = 0
+
+
+def test_world_is_a_copy_until_pulled():
+    env = make(False)
+    world = env.engine.world
+    before = np.copy(world.position)
+    player = env.players[0]
+    x, y = player.position()
+    player.reset((x + 50, y), player.direction())
+    # The body moved, the copy did not
+    np.testing.assert_array_equal(world.position, before)
+    world.pull_kinematics()
+    assert (x + 50, y) in set(map(tuple, world.position))